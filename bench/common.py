@@ -0,0 +1,121 @@
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = tempfile.mkdtemp(prefix="kanban-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(BENCH_DIR, 'bench.db')}")
+os.environ.setdefault("STATIC_ROOT", os.path.join(BENCH_DIR, "dist"))
+sys.path.insert(0, str(ROOT))
+import httpx
+from sqlalchemy import insert
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+def summarize(samples: list[float]) -> str:
+    return (
+        f"p50 {percentile(samples, 0.5) * 1000:.2f} ms, p99 {percentile(samples, 0.99) * 1000:.2f} ms, "
+        f"mean {statistics.fmean(samples) * 1000:.2f} ms"
+    )
+def time_call(function, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+@asynccontextmanager
+async def app_client(url: str = ""):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+            yield client
+        return
+    import main
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+async def register(client: httpx.AsyncClient, password: str = "secret") -> tuple[int, dict, str]:
+    name = uuid.uuid4().hex[:12]
+    response = await client.post("/auth/register", json={"username": name, "email": f"{name}@example.com", "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get("/users/me", headers=headers)
+    return response.json()["id"], headers, name
+async def seed_board(client: httpx.AsyncClient, headers: dict, cards: int, lists: int = 10, labels: int = 5) -> int:
+    from database import SessionLocal
+    from models import Card, Comment, Label, List, card_labels_table
+    from ranking import initial_ranks
+    response = await client.post("/boards", json={"name": f"Bench {cards}"}, headers=headers)
+    response.raise_for_status()
+    board_id = response.json()["id"]
+    owner_id = response.json()["owner_id"]
+    per_list = max(1, cards // lists)
+    async with SessionLocal() as db:
+        list_ids = []
+        for index, position in enumerate(initial_ranks(lists)):
+            result = await db.execute(insert(List).returning(List.id), [{"name": f"List {index}", "board_id": board_id, "position": position}])
+            list_ids.append(result.scalar_one())
+        result = await db.execute(insert(Label).returning(Label.id), [
+            {"name": f"Label {index}", "color": "#61bd4f", "board_id": board_id} for index in range(labels)
+        ])
+        label_ids = result.scalars().all()
+        card_ids = []
+        ranks = initial_ranks(per_list)
+        for list_id in list_ids:
+            result = await db.execute(insert(Card).returning(Card.id), [
+                {
+                    "title": f"Card {list_id}-{index}",
+                    "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 2,
+                    "list_id": list_id,
+                    "board_id": board_id,
+                    "position": ranks[index],
+                }
+                for index in range(per_list)
+            ])
+            card_ids.extend(result.scalars().all())
+        await db.execute(insert(card_labels_table), [
+            {"card_id": card_id, "label_id": label_ids[index % len(label_ids)]} for index, card_id in enumerate(card_ids)
+        ])
+        await db.execute(insert(Comment), [
+            {"content": "Looks good to me.", "card_id": card_id, "user_id": owner_id} for card_id in card_ids
+        ])
+        await db.commit()
+    return board_id
+async def load(worker, clients: int, duration: float) -> tuple[list[float], int]:
+    samples: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    async def run():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = await worker()
+            except httpx.HTTPError:
+                ok = False
+            samples.append(time.perf_counter() - started)
+            errors += not ok
+    await asyncio.gather(*(run() for _ in range(clients)))
+    return samples, errors
+async def seed_board_via_api(client: httpx.AsyncClient, headers: dict, cards: int, lists: int = 5) -> tuple[int, list[int]]:
+    response = await client.post("/boards", json={"name": f"Bench {cards}"}, headers=headers)
+    response.raise_for_status()
+    board_id = response.json()["id"]
+    card_ids = []
+    for index in range(lists):
+        response = await client.post(f"/boards/{board_id}/lists", json={"name": f"List {index}", "board_id": board_id}, headers=headers)
+        response.raise_for_status()
+        list_id = response.json()["id"]
+        for card_index in range(cards // lists):
+            response = await client.post(
+                f"/lists/{list_id}/cards", json={"title": f"Card {index}-{card_index}", "list_id": list_id}, headers=headers
+            )
+            response.raise_for_status()
+            card_ids.append(response.json()["id"])
+    return board_id, card_ids
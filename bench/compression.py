@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import gzip
+import time
+from common import app_client, register, seed_board, summarize, time_call
+async def fetch(client, path: str, headers: dict) -> tuple[float, int, str]:
+    started = time.perf_counter()
+    async with client.stream("GET", path, headers=headers) as response:
+        response.raise_for_status()
+        size = 0
+        async for chunk in response.aiter_raw():
+            size += len(chunk)
+        encoding = response.headers.get("content-encoding", "identity")
+    return time.perf_counter() - started, size, encoding
+async def run(sizes: list[int], repeat: int, url: str):
+    from middleware.compression import COMPRESSION_LEVELS, brotli
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    if brotli is None:
+        print("brotli is not installed; skipping br")
+    async with app_client(url) as client:
+        _, headers, _ = await register(client)
+        for size in sizes:
+            board_id = await seed_board(client, headers, size)
+            path = f"/boards/{board_id}"
+            await fetch(client, path, headers)
+            print(f"board with {size} cards")
+            for encoding in encodings:
+                request_headers = dict(headers, **{"Accept-Encoding": encoding})
+                samples = []
+                for _ in range(repeat):
+                    elapsed, size_bytes, served = await fetch(client, path, request_headers)
+                    samples.append(elapsed)
+                print(f"  {encoding:8} served {served:8} {size_bytes / 1024:9.1f} KiB  {summarize(samples)}")
+            async with client.stream("GET", path, headers=dict(headers, **{"Accept-Encoding": "identity"})) as response:
+                body = await response.aread()
+            for _, gzip_level, brotli_quality in COMPRESSION_LEVELS:
+                compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+                samples = time_call(lambda: gzip.compress(body, compresslevel=gzip_level, mtime=0), repeat)
+                print(f"  gzip level {gzip_level}   {len(compressed) / 1024:9.1f} KiB  compress {summarize(samples)}")
+                if brotli is not None:
+                    compressed = brotli.compress(body, quality=brotli_quality)
+                    samples = time_call(lambda: brotli.compress(body, quality=brotli_quality), repeat)
+                    print(f"  br quality {brotli_quality}   {len(compressed) / 1024:9.1f} KiB  compress {summarize(samples)}")
+def main():
+    parser = argparse.ArgumentParser(description="GET /boards/{id} latency and bytes on the wire per Content-Encoding.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--url", default="", help="measure a running server instead of the in-process app")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat, args.url))
+if __name__ == "__main__":
+    main()
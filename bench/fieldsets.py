@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import time
+from common import app_client, register, seed_board, summarize
+KANBAN_FIELDS = "name,lists.name,lists.position,lists.cards.title,lists.cards.position,lists.cards.list_id,lists.cards.labels"
+async def measure(load, serialize, repeat: int) -> tuple[list[float], list[float], int]:
+    loads, encodes = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = await load()
+        loaded = time.perf_counter()
+        body = serialize(data)
+        loads.append(loaded - started)
+        encodes.append(time.perf_counter() - loaded)
+    return loads, encodes, len(body)
+async def run(sizes: list[int], repeat: int):
+    from sqlalchemy import select
+    from database import SessionLocal
+    from fieldsets import expand_fields, parse_fieldset, select_fields
+    from main import BOARD_LOAD_OPTIONS
+    from models import Board
+    from responses import encode_json, render
+    from schemas import BoardResponse
+    from snapshot import load_board_snapshot
+    spec = parse_fieldset("board", KANBAN_FIELDS, None)
+    async with app_client() as client:
+        _, headers, _ = await register(client)
+        for size in sizes:
+            board_id = await seed_board(client, headers, size)
+            async with SessionLocal() as db:
+                async def orm():
+                    db.expunge_all()
+                    result = await db.execute(select(Board).where(Board.id == board_id).options(*BOARD_LOAD_OPTIONS))
+                    return result.scalar_one()
+                async def snapshot():
+                    return await load_board_snapshot(db, board_id)
+                async def sparse():
+                    result = await db.execute(select_fields("board", spec).where(Board.id == board_id))
+                    return (await expand_fields(db, "board", spec, result.mappings().all()))[0]
+                variants = (
+                    ("full, ORM + BoardResponse", orm, lambda board: BoardResponse.model_validate(board).model_dump_json().encode()),
+                    ("full, row snapshot", snapshot, lambda board: render(BoardResponse, board)),
+                    ("sparse kanban fields", sparse, encode_json),
+                )
+                print(f"board with {size} cards")
+                for name, load, serialize in variants:
+                    loads, encodes, size_bytes = await measure(load, serialize, repeat)
+                    print(f"  {name:26} {size_bytes / 1024:9.1f} KiB  load {summarize(loads)}")
+                    print(f"  {'':26} {'':13}  serialize {summarize(encodes)}")
+def main():
+    parser = argparse.ArgumentParser(description="Payload size and serialization time: full board vs sparse fieldsets.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+if __name__ == "__main__":
+    main()
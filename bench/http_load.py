@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import random
+from common import app_client, load, register, seed_board_via_api, summarize
+async def run(url: str, clients: int, duration: float, cards: int):
+    async with app_client(url) as client:
+        _, headers, _ = await register(client)
+        board_id, card_ids = await seed_board_via_api(client, headers, cards)
+        rng = random.Random(1)
+        async def request() -> bool:
+            roll = rng.random()
+            if roll < 0.6:
+                response = await client.get(f"/boards/{board_id}", headers=headers)
+            elif roll < 0.85:
+                response = await client.get(f"/cards/{rng.choice(card_ids)}", headers=headers)
+            else:
+                response = await client.put(f"/cards/{rng.choice(card_ids)}", json={"title": f"Card {rng.random():.6f}"}, headers=headers)
+            return response.status_code < 400
+        samples, errors = await load(request, clients, duration)
+    print(f"{clients} clients, {duration:.0f} s, board with {cards} cards, {'server ' + url if url else 'in-process'}")
+    print(f"  {len(samples)} requests, {len(samples) / duration:.1f} req/s, {errors} errors")
+    print(f"  latency {summarize(samples)}")
+def main():
+    parser = argparse.ArgumentParser(description="Mixed board/card read-write load at a fixed client count.")
+    parser.add_argument("--url", default="", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--cards", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.duration, args.cards))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+from common import app_client, load, register, seed_board_via_api, summarize
+async def run(url: str, readers: int, logins: int, duration: float):
+    async with app_client(url) as client:
+        _, headers, username = await register(client)
+        board_id, _ = await seed_board_via_api(client, headers, 50)
+        async def read_board() -> bool:
+            response = await client.get(f"/boards/{board_id}", headers=headers)
+            return response.status_code == 200
+        async def log_in() -> bool:
+            response = await client.post("/auth/login", data={"username": username, "password": "secret"})
+            return response.status_code == 200
+        quiet, _ = await load(read_board, readers, duration)
+        (busy, _), (attempts, rejected) = await asyncio.gather(load(read_board, readers, duration), load(log_in, logins, duration))
+    print(f"{readers} board readers, {duration:.0f} s per phase, {'server ' + url if url else 'in-process'}")
+    print(f"  board reads, no logins:        {len(quiet) / duration:7.1f} req/s, {summarize(quiet)}")
+    print(f"  board reads, {logins:3} login clients: {len(busy) / duration:7.1f} req/s, {summarize(busy)}")
+    print(f"  logins: {len(attempts) - rejected} succeeded, {rejected} rejected (503 when the hash queue is full), {summarize(attempts)}")
+def main():
+    parser = argparse.ArgumentParser(description="Board read latency with and without a concurrent login storm.")
+    parser.add_argument("--url", default="", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.readers, args.logins, args.duration))
+if __name__ == "__main__":
+    main()
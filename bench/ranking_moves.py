@@ -0,0 +1,55 @@
+import argparse
+import random
+import sys
+import time
+from bisect import insort
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ranking import initial_ranks, needs_rebalance, rank_between
+def integer_moves(cards: int, moves: int, rng: random.Random) -> tuple[float, int]:
+    order = list(range(cards))
+    written = 0
+    started = time.perf_counter()
+    for _ in range(moves):
+        source = rng.randrange(cards)
+        index = rng.randrange(cards)
+        order.insert(index, order.pop(source))
+        written += abs(index - source) + 1
+    return time.perf_counter() - started, written
+def rank_moves(cards: int, moves: int, rng: random.Random) -> tuple[float, int, int, int]:
+    ranks = initial_ranks(cards)
+    written = rebalances = longest = 0
+    started = time.perf_counter()
+    for _ in range(moves):
+        ranks.pop(rng.randrange(cards))
+        index = rng.randrange(cards)
+        rank = rank_between(ranks[index - 1] if index > 0 else None, ranks[index] if index < len(ranks) else None)
+        insort(ranks, rank)
+        written += 1
+        longest = max(longest, len(rank))
+        if needs_rebalance(rank):
+            ranks = initial_ranks(cards)
+            written += cards
+            rebalances += 1
+    return time.perf_counter() - started, written, rebalances, longest
+def main():
+    parser = argparse.ArgumentParser(description="Random moves on one list: integer renumbering vs rank keys.")
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--moves", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    elapsed, written = integer_moves(args.cards, args.moves, random.Random(args.seed))
+    print(f"integer positions: {written / args.moves:.1f} rows/move, {elapsed / args.moves * 1e6:.1f} us/move")
+    elapsed, written, rebalances, longest = rank_moves(args.cards, args.moves, random.Random(args.seed))
+    print(
+        f"rank keys:         {written / args.moves:.1f} rows/move, {elapsed / args.moves * 1e6:.1f} us/move, "
+        f"{rebalances} rebalances, longest key {longest}"
+    )
+    adversarial = ["V"]
+    for _ in range(args.moves):
+        adversarial.insert(0, rank_between(None, adversarial[0]))
+        if needs_rebalance(adversarial[0]):
+            adversarial = initial_ranks(len(adversarial))
+    print(f"head inserts:      longest key {max(map(len, adversarial))} after {args.moves} inserts")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import json
+from common import app_client, register, seed_board, summarize, time_call
+async def run(sizes: list[int], repeat: int):
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+    from database import SessionLocal
+    from main import BOARD_LOAD_OPTIONS
+    from models import Board
+    from responses import encode_json, render
+    from schemas import BoardResponse
+    from snapshot import load_board_snapshot
+    async with app_client() as client:
+        _, headers, _ = await register(client)
+        for size in sizes:
+            board_id = await seed_board(client, headers, size)
+            async with SessionLocal() as db:
+                result = await db.execute(select(Board).where(Board.id == board_id).options(*BOARD_LOAD_OPTIONS))
+                board = result.scalar_one()
+                snapshot = await load_board_snapshot(db, board_id)
+                variants = (
+                    ("jsonable_encoder + json", lambda: json.dumps(jsonable_encoder(BoardResponse.model_validate(board))).encode()),
+                    ("model_validate + dump_json", lambda: BoardResponse.model_validate(board).model_dump_json().encode()),
+                    ("render, ORM objects", lambda: render(BoardResponse, board)),
+                    ("render, row snapshot", lambda: render(BoardResponse, snapshot)),
+                    ("orjson, row snapshot", lambda: encode_json(snapshot)),
+                )
+                print(f"board with {size} cards")
+                for name, serialize in variants:
+                    size_bytes = len(serialize())
+                    print(f"  {name:28} {size_bytes / 1024:9.1f} KiB  {summarize(time_call(serialize, repeat))}")
+def main():
+    parser = argparse.ArgumentParser(description="BoardResponse serialization time: Pydantic models vs cached TypeAdapter vs raw rows.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from common import app_client, register, seed_board
+class Sink:
+    scope = {"subprotocols": []}
+def deflate_stream():
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+def frame_sizes(events: list[dict], encode) -> tuple[float, float]:
+    raw = compressed = 0
+    deflate = deflate_stream()
+    for event in events:
+        data = encode(event)
+        data = data.encode() if isinstance(data, str) else data
+        raw += len(data)
+        compressed += len(deflate(data))
+    return raw / len(events), compressed / len(events)
+async def broadcast_cost(frames: list[str], binary: bool, connections: int) -> float:
+    from realtime import SUBPROTOCOL_JSON, SUBPROTOCOL_MSGPACK, Connection, ConnectionManager
+    manager = ConnectionManager()
+    subprotocol = SUBPROTOCOL_MSGPACK if binary else SUBPROTOCOL_JSON
+    manager.active_connections["bench"] = {
+        Sink(): Connection(None, "bench", index, subprotocol, max_queue=len(frames) + 1) for index in range(connections)
+    }
+    started = time.perf_counter()
+    for frame in frames:
+        await manager.deliver("bench", frame)
+    return (time.perf_counter() - started) / len(frames)
+async def run(sizes: list[int], connections: int):
+    from realtime import encode_message, encode_msgpack
+    from responses import render
+    from schemas import BoardResponse
+    from snapshot import load_board_snapshot
+    from database import SessionLocal
+    async with app_client() as client:
+        _, headers, _ = await register(client)
+        for size in sizes:
+            board_id = await seed_board(client, headers, size)
+            async with SessionLocal() as db:
+                board = json.loads(render(BoardResponse, await load_board_snapshot(db, board_id)))
+            cards = [card for board_list in board["lists"] for card in board_list["cards"]]
+            first_list = board["lists"][0]
+            events = []
+            for version, card in enumerate(cards[:200], start=1):
+                events.append({"type": "card_updated", "card_id": card["id"], "card": card, "version": version})
+                events.append({"type": "card_moved", "card_id": card["id"], "list_id": card["list_id"], "position": card["position"], "card": card, "version": version})
+            reorder = {
+                "type": "cards_reordered", "list_id": first_list["id"],
+                "positions": {card["id"]: card["position"] for card in first_list["cards"]}, "version": 1,
+            }
+            print(f"board with {size} cards")
+            for name, sample in (("card events", events), ("cards_reordered", [reorder]), ("board snapshot", [board])):
+                json_raw, json_deflated = frame_sizes(sample, encode_message)
+                pack_raw, pack_deflated = frame_sizes(sample, encode_msgpack)
+                print(
+                    f"  {name:16} bytes/event  json {json_raw:10.0f} (deflate {json_deflated:9.0f})"
+                    f"  msgpack {pack_raw:10.0f} (deflate {pack_deflated:9.0f})"
+                )
+            frames = [encode_message(event) for event in events]
+            for binary in (False, True):
+                cost = await broadcast_cost(frames, binary, connections)
+                deflate = deflate_stream()
+                payloads = [encode_msgpack(event) if binary else frame.encode() for event, frame in zip(events, frames)]
+                started = time.perf_counter()
+                for payload in payloads:
+                    deflate(payload)
+                per_socket = (time.perf_counter() - started) / len(payloads)
+                print(
+                    f"  {'msgpack' if binary else 'json':7} fan-out to {connections} sockets: {cost * 1000:.3f} ms/broadcast, "
+                    f"+{per_socket * connections * 1000:.3f} ms/broadcast with permessage-deflate"
+                )
+def main():
+    parser = argparse.ArgumentParser(description="Websocket bytes per event and CPU per broadcast: JSON vs MessagePack.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[100, 1000, 10000])
+    parser.add_argument("--connections", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.connections))
+if __name__ == "__main__":
+    main()
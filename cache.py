@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    def pop(self, key):
+        self._data.pop(key, None)
+    def pop_where(self, predicate):
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+    def clear(self):
+        self._data.clear()
+class SizedLRUCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: OrderedDict = OrderedDict()
+    def get(self, key, default=None):
+        value = self._data.get(key)
+        if value is None:
+            return default
+        self._data.move_to_end(key)
+        return value
+    def set(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        self.pop(key)
+        self._data[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+    def pop(self, key):
+        value = self._data.pop(key, None)
+        if value is not None:
+            self.size -= len(value)
+    def pop_where(self, predicate):
+        for key in [key for key in self._data if predicate(key)]:
+            self.pop(key)
@@ -0,0 +1,91 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User, Board, List, Card, Label, Comment, BoardChange, card_labels_table, card_assignees_table
+from snapshot import (
+    USER_COLUMNS, BOARD_COLUMNS, LIST_COLUMNS, CARD_COLUMNS, LABEL_COLUMNS, COMMENT_COLUMNS,
+    COMMENT_AUTHOR_COLUMNS, user_dict, label_dict, comment_dict, load_board_snapshot
+)
+async def _load_boards(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(select(*BOARD_COLUMNS).where(Board.id.in_(ids)))
+    return {row["id"]: dict(row) for row in result.mappings()}
+async def _load_lists(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(select(*LIST_COLUMNS).where(List.id.in_(ids)))
+    return {row["id"]: dict(row) for row in result.mappings()}
+async def _load_cards(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(select(*CARD_COLUMNS).where(Card.id.in_(ids)))
+    cards = {row["id"]: dict(row, labels=[], assignees=[]) for row in result.mappings()}
+    if cards:
+        result = await db.execute(
+            select(card_labels_table.c.card_id, *LABEL_COLUMNS)
+            .join(Label, Label.id == card_labels_table.c.label_id)
+            .where(card_labels_table.c.card_id.in_(cards))
+            .order_by(Label.id)
+        )
+        for row in result.all():
+            cards[row.card_id]["labels"].append(label_dict(row))
+        result = await db.execute(
+            select(card_assignees_table.c.card_id, *USER_COLUMNS)
+            .join(User, User.id == card_assignees_table.c.user_id)
+            .where(card_assignees_table.c.card_id.in_(cards))
+            .order_by(User.id)
+        )
+        for row in result.all():
+            cards[row.card_id]["assignees"].append(user_dict(row))
+    return cards
+async def _load_labels(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(select(*LABEL_COLUMNS).where(Label.id.in_(ids)))
+    return {row.id: label_dict(row) for row in result.all()}
+async def _load_comments(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(
+        select(*COMMENT_COLUMNS, *COMMENT_AUTHOR_COLUMNS)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.id.in_(ids))
+    )
+    return {row["id"]: comment_dict(row) for row in result.mappings()}
+async def _load_members(db: AsyncSession, ids: list[int]) -> dict[int, dict]:
+    result = await db.execute(select(*USER_COLUMNS).where(User.id.in_(ids)))
+    return {row.id: user_dict(row) for row in result.all()}
+ENTITY_LOADERS = {
+    "board": _load_boards,
+    "list": _load_lists,
+    "card": _load_cards,
+    "label": _load_labels,
+    "comment": _load_comments,
+    "member": _load_members,
+}
+async def load_board_changes(db: AsyncSession, board_id: int, since: int) -> Optional[dict]:
+    result = await db.execute(select(Board.version).where(Board.id == board_id))
+    version = result.scalar_one_or_none()
+    if version is None:
+        return None
+    if since >= version:
+        return {"board_id": board_id, "since": since, "version": version, "changes": []}
+    result = await db.execute(
+        select(BoardChange.version, BoardChange.entity, BoardChange.entity_id, BoardChange.op)
+        .where(BoardChange.board_id == board_id, BoardChange.version > since)
+        .order_by(BoardChange.version, BoardChange.id)
+    )
+    rows = result.all()
+    if not rows or rows[0].version != since + 1:
+        snapshot = await load_board_snapshot(db, board_id)
+        if snapshot is None:
+            return None
+        return {"board_id": board_id, "since": since, "version": snapshot["version"], "full": True, "snapshot": snapshot}
+    latest: dict[tuple[str, int], str] = {}
+    for row in rows:
+        key = (row.entity, row.entity_id)
+        latest.pop(key, None)
+        latest[key] = row.op
+    upserts: dict[str, list[int]] = {}
+    for (entity, entity_id), op in latest.items():
+        if op == "upsert":
+            upserts.setdefault(entity, []).append(entity_id)
+    loaded = {entity: await ENTITY_LOADERS[entity](db, ids) for entity, ids in upserts.items()}
+    changes = []
+    for (entity, entity_id), op in latest.items():
+        data = loaded.get(entity, {}).get(entity_id) if op == "upsert" else None
+        if op == "upsert" and data is None:
+            op = "delete"
+        changes.append({"entity": entity, "id": entity_id, "op": op, "data": data})
+    return {"board_id": board_id, "since": since, "version": max(version, rows[-1].version), "changes": changes}
@@ -0,0 +1,97 @@
+import json
+import zlib
+from typing import Optional
+from fastapi import HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User, List, Card, Label, Comment, BoardMember, card_labels_table, card_assignees_table
+from snapshot import USER_COLUMNS, BOARD_COLUMNS, LIST_COLUMNS, CARD_COLUMNS, LABEL_COLUMNS, COMMENT_COLUMNS
+ENTITY_COLUMNS = {
+    "board": {column.key: column for column in BOARD_COLUMNS},
+    "list": {column.key: column for column in LIST_COLUMNS},
+    "card": {column.key: column for column in CARD_COLUMNS},
+    "label": {column.key: column for column in LABEL_COLUMNS},
+    "comment": {("author_id" if column.key == "user_id" else column.key): column for column in COMMENT_COLUMNS},
+    "user": {column.key: column for column in USER_COLUMNS},
+}
+RELATIONS = {
+    "board": {
+        "lists": ("list", List.board_id, None, None, (List.position, List.id), True),
+        "members": ("user", BoardMember.board_id, User, User.id == BoardMember.user_id, (User.id,), True),
+    },
+    "list": {
+        "cards": ("card", Card.list_id, None, None, (Card.position, Card.id), True),
+    },
+    "card": {
+        "labels": ("label", card_labels_table.c.card_id, Label, Label.id == card_labels_table.c.label_id, (Label.id,), True),
+        "comments": ("comment", Comment.card_id, None, None, (Comment.created_at.desc(), Comment.id.desc()), True),
+        "assignees": ("user", card_assignees_table.c.card_id, User, User.id == card_assignees_table.c.user_id, (User.id,), True),
+    },
+    "label": {},
+    "comment": {
+        "author": ("user", Comment.id, User, User.id == Comment.user_id, (), False),
+    },
+    "user": {},
+}
+def _new_spec() -> dict:
+    return {"fields": [], "expand": {}}
+def _split(value: Optional[str]) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+def _resolve(entity: str, spec: dict, path: str, parts: list[str], expand: bool):
+    name, rest = parts[0], parts[1:]
+    relation = RELATIONS[entity].get(name)
+    if relation is not None:
+        child = spec["expand"].setdefault(name, _new_spec())
+        if rest:
+            _resolve(relation[0], child, path, rest, expand)
+        return
+    if rest or expand or name not in ENTITY_COLUMNS[entity]:
+        raise HTTPException(status_code=400, detail=f"Unknown field '{path}'")
+    if name not in spec["fields"]:
+        spec["fields"].append(name)
+def parse_fieldset(entity: str, fields: Optional[str], expand: Optional[str]) -> Optional[dict]:
+    if not fields and not expand:
+        return None
+    spec = _new_spec()
+    for path in _split(expand):
+        _resolve(entity, spec, path, path.split("."), True)
+    for path in _split(fields):
+        _resolve(entity, spec, path, path.split("."), False)
+    return spec
+def fieldset(entity: str):
+    def dependency(fields: Optional[str] = Query(None), expand: Optional[str] = Query(None)) -> Optional[dict]:
+        return parse_fieldset(entity, fields, expand)
+    return dependency
+def fieldset_key(spec: dict) -> str:
+    return f"{zlib.crc32(json.dumps(spec, sort_keys=True).encode()):08x}"
+def selected_fields(entity: str, spec: dict) -> list[str]:
+    names = spec["fields"] or list(ENTITY_COLUMNS[entity])
+    return names if "id" in names else ["id", *names]
+def select_fields(entity: str, spec: dict, *extra_columns):
+    columns = ENTITY_COLUMNS[entity]
+    names = selected_fields(entity, spec)
+    return select(
+        *(columns[name].label(name) for name in names),
+        *(column.label(column.key) for column in extra_columns if column.key not in names)
+    )
+async def expand_fields(db: AsyncSession, entity: str, spec: dict, rows) -> list[dict]:
+    names = selected_fields(entity, spec)
+    output = [{name: row[name] for name in names} for row in rows]
+    if not output:
+        return output
+    ids = list({item["id"] for item in output})
+    for relation, child_spec in spec["expand"].items():
+        target, parent_column, join_model, onclause, order_by, many = RELATIONS[entity][relation]
+        query = select_fields(target, child_spec).add_columns(parent_column.label("parent_id"))
+        if join_model is not None:
+            query = query.select_from(parent_column.table).join(join_model, onclause)
+        result = await db.execute(query.where(parent_column.in_(ids)).order_by(*order_by))
+        child_rows = result.mappings().all()
+        children = await expand_fields(db, target, child_spec, child_rows)
+        grouped: dict[int, list[dict]] = {}
+        for child_row, child in zip(child_rows, children):
+            grouped.setdefault(child_row["parent_id"], []).append(child)
+        for item in output:
+            matches = grouped.get(item["id"], [])
+            item[relation] = matches if many else (matches[0] if matches else None)
+    return output
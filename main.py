@@ -1,660 +1,983 @@
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, status, Query, Path, Body
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status, Query, Path, Body
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import select, delete, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import timedelta
 import json
-import os
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from typing import Optional, List
-from models import User, Board, List, Card, Label, Comment, BoardMember
+from typing import Optional
+from models import User, Board, List, Card, Label, Comment, BoardMember, card_labels_table, card_assignees_table
 from schemas import (
     Token, TokenRefresh, UserCreate, UserUpdate, UserResponse,
     BoardCreate, BoardUpdate, BoardResponse, ListCreate, ListUpdate,
     ListResponse, CardCreate, CardUpdate, CardResponse, LabelCreate,
     LabelResponse, CommentCreate, CommentUpdate, CommentResponse,
-    CardMove, BoardMemberAdd
+    CardMove, BoardMemberAdd, BoardChangesResponse, ReorderItem,
+    CardBase, BatchRequest, BatchResponse, UserBase, BoardBase, ListBase, PresenceEntry
 )
-from database import get_db, init_db
+from database import get_db, get_read_db, init_db, pool_stats, replicas, SessionLocal
 from middleware.auth import (
     create_access_token, create_refresh_token, verify_token,
     get_current_user, get_current_active_user, get_current_user_optional,
-    rotate_refresh_token, setup_auth
+    rotate_refresh_token, setup_auth, get_user_by_id, resolve_user, invalidate_user,
+    get_password_hash, authenticate_user
 )
 from middleware.cors import setup_cors
+from middleware.compression import setup_compression
+from middleware.profiling import setup_query_profiling
+from middleware.read_your_writes import setup_read_your_writes
+from middleware.metrics import setup_metrics
+from changelog import load_board_changes
+from snapshot import (
+    load_board_snapshot, bump_board_version, get_board_version, forget_board,
+    board_etag, etag_matches, snapshot_cache, comment_dict, LABEL_COLUMNS, COMMENT_COLUMNS, COMMENT_AUTHOR_COLUMNS
+)
+from ranking import rank_for_index, initial_ranks, needs_rebalance, write_positions
+from realtime import ConnectionManager
+from static_assets import static_assets
+from fieldsets import fieldset, fieldset_key, select_fields, expand_fields
+from pagination import paginate, cursor_headers, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from responses import render, render_response, encode_json, json_response
+from permissions import (
+    check_board_permission, get_board_role, invalidate_board_permissions, apply_permission_invalidation, ROLE_OWNER
+)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+CARD_LOAD_OPTIONS = (
+    selectinload(Card.labels),
+    selectinload(Card.comments).selectinload(Comment.user),
+    selectinload(Card.assignees),
+)
+LIST_LOAD_OPTIONS = (selectinload(List.cards).options(*CARD_LOAD_OPTIONS),)
+BOARD_LOAD_OPTIONS = (
+    selectinload(Board.lists).options(*LIST_LOAD_OPTIONS),
+    selectinload(Board.members),
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 app = FastAPI(title="Trello Clone API", version="1.0.0")
 setup_cors(app)
+setup_compression(app)
 setup_auth(app)
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, list[WebSocket]] = {}
-    async def connect(self, websocket: WebSocket, board_id: str):
-        await websocket.accept()
-        if board_id not in self.active_connections:
-            self.active_connections[board_id] = []
-        self.active_connections[board_id].append(websocket)
-    def disconnect(self, websocket: WebSocket, board_id: str):
-        if board_id in self.active_connections:
-            self.active_connections[board_id].remove(websocket)
-            if not self.active_connections[board_id]:
-                del self.active_connections[board_id]
-    async def broadcast(self, message: dict, board_id: str):
-        if board_id in self.active_connections:
-            for connection in self.active_connections[board_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    pass
+setup_query_profiling(app)
+setup_read_your_writes(app)
 manager = ConnectionManager()
-def check_board_permission(board_id: int, user: User, db: Session, require_admin: bool = False):
-    board = db.query(Board).filter(Board.id == board_id).first()
-    if not board:
-        raise HTTPException(status_code=404, detail="Board not found")
-    if board.owner_id == user.id:
-        return True
-    membership = db.query(BoardMember).filter(
-        BoardMember.board_id == board_id,
-        BoardMember.user_id == user.id
-    ).first()
-    if not membership:
-        raise HTTPException(status_code=403, detail="Access denied")
-    if require_admin and not membership.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return True
+manager.add_invalidation_listener(apply_permission_invalidation)
+setup_metrics(app, manager)
+EVENT_SCHEMAS = (
+    (Card, CardBase),
+    (List, ListBase),
+    (Label, LabelResponse),
+    (Comment, CommentResponse),
+    (Board, BoardBase),
+    (User, UserBase),
+)
+def serialize_entity(value):
+    for model, schema in EVENT_SCHEMAS:
+        if isinstance(value, model):
+            return schema.model_validate(value).model_dump(mode="json")
+    return value
+def serialize_event(event: dict, version: Optional[int] = None) -> dict:
+    payload = {key: serialize_entity(value) for key, value in event.items()}
+    if version is not None:
+        payload["version"] = version
+    return payload
+async def invalidate_permissions(db: AsyncSession, board_id: int, user_id: Optional[int] = None):
+    invalidate_board_permissions(board_id, user_id, db)
+    await manager.invalidate({"type": "permissions", "board_id": board_id, "user_id": user_id})
+async def get_list_or_404(db: AsyncSession, list_id: int, *options) -> List:
+    result = await db.execute(select(List).where(List.id == list_id).options(*options))
+    list_item = result.scalar_one_or_none()
+    if not list_item:
+        raise HTTPException(status_code=404, detail="List not found")
+    return list_item
+async def get_card_or_404(db: AsyncSession, card_id: int, *options) -> Card:
+    result = await db.execute(select(Card).where(Card.id == card_id).options(*options))
+    card = result.scalar_one_or_none()
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return card
+async def get_card_board_id(db: AsyncSession, card_id: int) -> int:
+    result = await db.execute(select(Card.board_id).where(Card.id == card_id))
+    board_id = result.scalar_one_or_none()
+    if board_id is None:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return board_id
+async def bump_user_boards(db: AsyncSession, user_id: int, op: str) -> dict[int, int]:
+    changes: dict[int, list[tuple[str, int, str]]] = {}
+    result = await db.execute(select(BoardMember.board_id).where(BoardMember.user_id == user_id))
+    for board_id in result.scalars().all():
+        changes.setdefault(board_id, []).append(("member", user_id, op))
+    result = await db.execute(
+        select(Card.board_id, Comment.id).join(Comment, Comment.card_id == Card.id).where(Comment.user_id == user_id)
+    )
+    for board_id, comment_id in result.all():
+        changes.setdefault(board_id, []).append(("comment", comment_id, op))
+    result = await db.execute(
+        select(Card.board_id, Card.id)
+        .join(card_assignees_table, card_assignees_table.c.card_id == Card.id)
+        .where(card_assignees_table.c.user_id == user_id)
+    )
+    for board_id, card_id in result.all():
+        changes.setdefault(board_id, []).append(("card", card_id, "upsert"))
+    return {board_id: await bump_board_version(db, board_id, board_changes) for board_id, board_changes in changes.items()}
+def rebalanced_events(db: AsyncSession) -> tuple[list[tuple[str, int, str]], list[dict]]:
+    changes, events = [], []
+    for model, parent_id, positions in db.info.pop("rebalanced", []):
+        if model is Card:
+            changes.extend(("card", card_id, "upsert") for card_id in positions)
+            events.append({"type": "cards_reordered", "list_id": parent_id, "positions": positions})
+        else:
+            changes.extend(("list", list_id, "upsert") for list_id in positions)
+            events.append({"type": "lists_reordered", "board_id": parent_id, "positions": positions})
+    return changes, events
+def with_rebalanced(db: AsyncSession, board_id: int, changes: list, event: dict) -> tuple[list, dict]:
+    rebalance_changes, events = rebalanced_events(db)
+    if not events:
+        return changes, event
+    return rebalance_changes + changes, {
+        "type": "batch", "board_id": board_id, "events": [serialize_event(item) for item in events + [event]]
+    }
+async def rebalance_lists(board_id: int):
+    async with SessionLocal() as db:
+        result = await db.execute(select(List.id).where(List.board_id == board_id).order_by(List.position, List.id))
+        list_ids = result.scalars().all()
+        positions = dict(zip(list_ids, initial_ranks(len(list_ids))))
+        await write_positions(db, List, positions)
+        version = await bump_board_version(db, board_id, [("list", list_id, "upsert") for list_id in list_ids])
+        await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "lists_reordered", "board_id": board_id, "positions": positions}, version), str(board_id)
+    )
+async def rebalance_cards(board_id: int, list_id: int):
+    async with SessionLocal() as db:
+        result = await db.execute(select(Card.id).where(Card.list_id == list_id).order_by(Card.position, Card.id))
+        card_ids = result.scalars().all()
+        positions = dict(zip(card_ids, initial_ranks(len(card_ids))))
+        await write_positions(db, Card, positions)
+        version = await bump_board_version(db, board_id, [("card", card_id, "upsert") for card_id in card_ids])
+        await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "cards_reordered", "list_id": list_id, "positions": positions}, version), str(board_id)
+    )
+async def apply_card_update(db: AsyncSession, card: Card, card_update: CardUpdate):
+    if card_update.title is not None:
+        card.title = card_update.title
+    if card_update.description is not None:
+        card.description = card_update.description
+    if card_update.position is not None:
+        card.position = await rank_for_index(
+            db, Card, Card.list_id, card.list_id, card_update.position, exclude_id=card.id
+        )
+    if card_update.due_date is not None:
+        card.due_date = card_update.due_date
+    return card, [("card", card.id, "upsert")], {"type": "card_updated", "card_id": card.id, "card": card}
+async def apply_card_move(db: AsyncSession, card: Card, move_data: CardMove):
+    result = await db.execute(select(List.board_id).where(List.id == move_data.new_list_id))
+    new_board_id = result.scalar_one_or_none()
+    if new_board_id is None:
+        raise HTTPException(status_code=404, detail="Target list not found")
+    if new_board_id != card.board_id:
+        raise HTTPException(status_code=400, detail="Target list must belong to the same board")
+    card.position = await rank_for_index(
+        db, Card, Card.list_id, move_data.new_list_id, move_data.new_position, exclude_id=card.id
+    )
+    card.list_id = move_data.new_list_id
+    return card, [("card", card.id, "upsert")], {
+        "type": "card_moved",
+        "card_id": card.id,
+        "list_id": card.list_id,
+        "position": card.position,
+        "card": card
+    }
+async def apply_label_add(db: AsyncSession, card: Card, label_data: LabelCreate):
+    result = await db.execute(select(Label).where(
+        Label.name == label_data.name,
+        Label.color == label_data.color,
+        Label.board_id == card.board_id
+    ))
+    label = result.scalar_one_or_none()
+    changes = [("card", card.id, "upsert")]
+    if not label:
+        label = Label(name=label_data.name, color=label_data.color, board_id=card.board_id)
+        db.add(label)
+        await db.flush()
+        changes.insert(0, ("label", label.id, "upsert"))
+    if label not in card.labels:
+        card.labels.append(label)
+    return label, changes, {"type": "label_added_to_card", "card_id": card.id, "label": label}
+async def apply_label_remove(db: AsyncSession, card: Card, label_id: int):
+    result = await db.execute(select(Label).where(Label.id == label_id))
+    label = result.scalar_one_or_none()
+    if not label:
+        raise HTTPException(status_code=404, detail="Label not found")
+    changes = []
+    if label in card.labels:
+        card.labels.remove(label)
+        changes.append(("card", card.id, "upsert"))
+    return None, changes, {"type": "label_removed_from_card", "card_id": card.id, "label_id": label_id}
+async def apply_comment_create(db: AsyncSession, card: Card, comment_data: CommentCreate, author: User):
+    comment = Comment(content=comment_data.content, card_id=card.id, author_id=author.id)
+    db.add(comment)
+    await db.flush()
+    return comment, [("comment", comment.id, "upsert")], {"type": "comment_created", "card_id": card.id, "comment": comment}
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    await init_db()
+    static_assets.scan()
+    await manager.start()
+    await replicas.start()
+@app.on_event("shutdown")
+async def shutdown_event():
+    await manager.stop()
+    await replicas.stop()
 @app.post("/auth/register", response_model=Token)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User.id).where(User.username == user.username))
+    if result.first():
         raise HTTPException(status_code=400, detail="Username already registered")
     if user.email:
-        db_email = db.query(User).filter(User.email == user.email).first()
-        if db_email:
+        result = await db.execute(select(User.id).where(User.email == user.email))
+        if result.first():
             raise HTTPException(status_code=400, detail="Email already registered")
-    from middleware.auth import get_password_hash
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     db_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    access_token = create_access_token(data={"sub": db_user.username}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    refresh_token = create_refresh_token(data={"sub": db_user.username}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    await db.commit()
+    access_token = create_access_token(data={"sub": str(db_user.id)}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    refresh_token = create_refresh_token(data={"sub": str(db_user.id)})
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 @app.post("/auth/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    from middleware.auth import authenticate_user
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    access_token = create_access_token(data={"sub": user.username}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    refresh_token = create_refresh_token(data={"sub": user.username}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 @app.post("/auth/refresh", response_model=Token)
-async def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
-    payload = verify_token(token_data.refresh_token, token_type="refresh")
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-    username: str = payload.get("sub")
-    if username is None:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    new_access_token = create_access_token(data={"sub": user.username}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    new_refresh_token = rotate_refresh_token(token_data.refresh_token, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    return {"access_token": new_access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
+async def refresh_token(token_data: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    return await rotate_refresh_token(token_data.refresh_token, db)
 @app.get("/users/me", response_model=UserResponse)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+    return render_response(UserResponse, current_user)
 @app.put("/users/me", response_model=UserResponse)
-async def update_user_me(user_update: UserUpdate, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def update_user_me(user_update: UserUpdate, current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_db)):
+    current_user = await db.merge(current_user, load=False)
     if user_update.username and user_update.username != current_user.username:
-        existing = db.query(User).filter(User.username == user_update.username).first()
-        if existing:
+        result = await db.execute(select(User.id).where(User.username == user_update.username))
+        if result.first():
             raise HTTPException(status_code=400, detail="Username already taken")
         current_user.username = user_update.username
     if user_update.email is not None:
-        existing = db.query(User).filter(User.email == user_update.email).first()
-        if existing:
+        result = await db.execute(select(User.id).where(User.email == user_update.email, User.id != current_user.id))
+        if result.first():
             raise HTTPException(status_code=400, detail="Email already taken")
         current_user.email = user_update.email
-    if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
-    db.commit()
-    db.refresh(current_user)
+    if user_update.avatar is not None:
+        current_user.avatar = user_update.avatar
+    await db.flush()
+    versions = await bump_user_boards(db, current_user.id, "upsert")
+    await db.commit()
+    invalidate_user(current_user.id)
+    for board_id, version in versions.items():
+        await manager.broadcast(serialize_event({
+            "type": "member_updated",
+            "board_id": board_id,
+            "user_id": current_user.id,
+            "member": current_user
+        }, version), str(board_id))
     return current_user
 @app.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user_me(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    db.delete(current_user)
-    db.commit()
+async def delete_user_me(current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_db)):
+    versions = await bump_user_boards(db, current_user.id, "delete")
+    await db.execute(delete(User).where(User.id == current_user.id))
+    await db.commit()
+    invalidate_user(current_user.id)
+    for board_id, version in versions.items():
+        await invalidate_permissions(db, board_id, current_user.id)
+        await manager.revoke(str(board_id), current_user.id)
+        await manager.broadcast(
+            serialize_event({"type": "member_removed", "board_id": board_id, "user_id": current_user.id}, version), str(board_id)
+        )
     return None
-@app.get("/boards", response_model=List[BoardResponse])
+@app.get("/boards", response_model=list[BoardResponse])
 async def get_user_boards(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    owned_boards = db.query(Board).filter(Board.owner_id == current_user.id).all()
-    member_boards = db.query(Board).join(BoardMember).filter(
-        BoardMember.user_id == current_user.id
-    ).all()
-    all_boards = list(set(owned_boards + member_boards))
-    return all_boards
+    member_board_ids = select(BoardMember.board_id).where(BoardMember.user_id == current_user.id)
+    result = await db.execute(
+        select(Board)
+        .where(or_(Board.owner_id == current_user.id, Board.id.in_(member_board_ids)))
+        .options(*BOARD_LOAD_OPTIONS)
+    )
+    return render_response(list[BoardResponse], result.scalars().all())
 @app.post("/boards", response_model=BoardResponse)
 async def create_board(
     board: BoardCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_board = Board(name=board.name, description=board.description, owner_id=current_user.id)
+    db_board = Board(name=board.name, description=board.description, owner_id=current_user.id, lists=[], members=[])
     db.add(db_board)
-    db.commit()
-    db.refresh(db_board)
+    await db.commit()
     return db_board
 @app.get("/boards/{board_id}", response_model=BoardResponse)
 async def get_board(
     board_id: int,
+    request: Request,
+    spec: Optional[dict] = Depends(fieldset("board")),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    check_board_permission(board_id, current_user, db)
-    board = db.query(Board).filter(Board.id == board_id).first()
-    if not board:
+    await check_board_permission(board_id, current_user, db)
+    version = await get_board_version(db, board_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Board not found")
-    return board
+    variant = fieldset_key(spec) if spec is not None else None
+    etag = board_etag(board_id, version, variant)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if spec is not None:
+        body = snapshot_cache.get((board_id, version, variant))
+        if body is None:
+            result = await db.execute(select_fields("board", spec, Board.version).where(Board.id == board_id))
+            rows = result.mappings().all()
+            boards = await expand_fields(db, "board", spec, rows)
+            if not boards:
+                raise HTTPException(status_code=404, detail="Board not found")
+            version = rows[0]["version"]
+            etag = board_etag(board_id, version, variant)
+            body = encode_json(boards[0])
+            snapshot_cache.set((board_id, version, variant), body)
+        return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+    body = snapshot_cache.get((board_id, version))
+    if body is None:
+        board = await load_board_snapshot(db, board_id)
+        if not board:
+            raise HTTPException(status_code=404, detail="Board not found")
+        version = board["version"]
+        etag = board_etag(board_id, version)
+        body = render(BoardResponse, board)
+        snapshot_cache.set((board_id, version), body)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+@app.get("/boards/{board_id}/changes", response_model=BoardChangesResponse)
+async def get_board_changes(
+    board_id: int,
+    since: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    await check_board_permission(board_id, current_user, db)
+    changes = await load_board_changes(db, board_id, since)
+    if changes is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return render_response(BoardChangesResponse, changes)
+@app.get("/boards/{board_id}/presence", response_model=list[PresenceEntry])
+async def get_board_presence(
+    board_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    await check_board_permission(board_id, current_user, db)
+    return render_response(list[PresenceEntry], manager.get_presence(str(board_id)))
+@app.post("/boards/{board_id}/batch", response_model=BatchResponse)
+async def batch_board_mutations(
+    board_id: int,
+    batch: BatchRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    await check_board_permission(board_id, current_user, db)
+    cards: dict[int, Card] = {}
+    results = []
+    changes = []
+    events = []
+    for index, operation in enumerate(batch.operations):
+        try:
+            card = cards.get(operation.card_id)
+            if card is None:
+                card = await get_card_or_404(db, operation.card_id, selectinload(Card.labels))
+                if card.board_id != board_id:
+                    raise HTTPException(status_code=404, detail="Card not found")
+                cards[card.id] = card
+            if operation.op == "move_card":
+                data, op_changes, event = await apply_card_move(db, card, operation)
+            elif operation.op == "update_card":
+                data, op_changes, event = await apply_card_update(db, card, operation)
+            elif operation.op == "add_label":
+                data, op_changes, event = await apply_label_add(db, card, operation)
+            elif operation.op == "remove_label":
+                data, op_changes, event = await apply_label_remove(db, card, operation.label_id)
+            else:
+                data, op_changes, event = await apply_comment_create(db, card, operation, current_user)
+            await db.flush()
+        except HTTPException as exc:
+            await db.rollback()
+            raise HTTPException(status_code=exc.status_code, detail={"index": index, "op": operation.op, "detail": exc.detail})
+        if isinstance(data, Comment):
+            set_committed_value(data, "user", current_user)
+        results.append({"index": index, "op": operation.op, "data": serialize_entity(data)})
+        rebalance_changes, rebalance_events = rebalanced_events(db)
+        changes.extend(rebalance_changes + op_changes)
+        events.extend(serialize_event(item) for item in rebalance_events + [event])
+    version = await bump_board_version(db, board_id, changes)
+    await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "batch", "board_id": board_id, "events": events}, version),
+        str(board_id)
+    )
+    for list_id in {card.list_id for card in cards.values() if needs_rebalance(card.position)}:
+        background_tasks.add_task(rebalance_cards, board_id, list_id)
+    return {"board_id": board_id, "version": version, "results": results}
 @app.put("/boards/{board_id}", response_model=BoardResponse)
 async def update_board(
     board_id: int,
     board_update: BoardUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    check_board_permission(board_id, current_user, db, require_admin=True)
-    board = db.query(Board).filter(Board.id == board_id).first()
+    await check_board_permission(board_id, current_user, db, require_admin=True)
+    result = await db.execute(select(Board).where(Board.id == board_id).options(*BOARD_LOAD_OPTIONS))
+    board = result.scalar_one_or_none()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     if board_update.name is not None:
         board.name = board_update.name
     if board_update.description is not None:
         board.description = board_update.description
-    db.commit()
-    db.refresh(board)
-    await manager.broadcast({"type": "board_updated", "board_id": board_id}, str(board_id))
+    version = await bump_board_version(db, board_id, [("board", board_id, "upsert")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "board_updated", "board_id": board_id, "board": board}, version), str(board_id))
     return board
 @app.delete("/boards/{board_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_board(
     board_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    board = db.query(Board).filter(Board.id == board_id).first()
-    if not board:
-        raise HTTPException(status_code=404, detail="Board not found")
-    if board.owner_id != current_user.id:
+    if await get_board_role(board_id, current_user.id, db) != ROLE_OWNER:
         raise HTTPException(status_code=403, detail="Only board owner can delete the board")
+    await db.execute(delete(List).where(List.board_id == board_id))
+    await db.execute(delete(BoardMember).where(BoardMember.board_id == board_id))
+    await db.execute(delete(Board).where(Board.id == board_id))
+    await db.commit()
+    await invalidate_permissions(db, board_id)
+    forget_board(board_id)
+    await manager.revoke(str(board_id))
     await manager.broadcast({"type": "board_deleted", "board_id": board_id}, str(board_id))
-    db.query(List).filter(List.board_id == board_id).delete()
-    db.query(BoardMember).filter(BoardMember.board_id == board_id).delete()
-    db.delete(board)
-    db.commit()
     return None
 @app.post("/boards/{board_id}/members", status_code=status.HTTP_204_NO_CONTENT)
 async def add_board_member(
     board_id: int,
     member_data: BoardMemberAdd,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    check_board_permission(board_id, current_user, db, require_admin=True)
-    user_to_add = db.query(User).filter(User.username == member_data.username).first()
+    await check_board_permission(board_id, current_user, db, require_admin=True)
+    user_to_add = await get_user_by_id(db, member_data.user_id)
     if not user_to_add:
         raise HTTPException(status_code=404, detail="User not found")
-    existing = db.query(BoardMember).filter(
+    result = await db.execute(select(BoardMember).where(
         BoardMember.board_id == board_id,
         BoardMember.user_id == user_to_add.id
-    ).first()
-    if existing:
+    ))
+    if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="User already a member")
     member = BoardMember(board_id=board_id, user_id=user_to_add.id, is_admin=member_data.is_admin)
     db.add(member)
-    db.commit()
-    await manager.broadcast({"type": "member_added", "board_id": board_id, "user_id": user_to_add.id}, str(board_id))
+    version = await bump_board_version(db, board_id, [("member", user_to_add.id, "upsert")])
+    await db.commit()
+    await invalidate_permissions(db, board_id, user_to_add.id)
+    await manager.broadcast(serialize_event({
+        "type": "member_added",
+        "board_id": board_id,
+        "user_id": user_to_add.id,
+        "member": user_to_add
+    }, version), str(board_id))
     return None
 @app.delete("/boards/{board_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_board_member(
     board_id: int,
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    check_board_permission(board_id, current_user, db, require_admin=True)
+    await check_board_permission(board_id, current_user, db, require_admin=True)
     if current_user.id == user_id:
         raise HTTPException(status_code=400, detail="Cannot remove yourself")
-    board = db.query(Board).filter(Board.id == board_id).first()
-    if board and board.owner_id == user_id:
+    result = await db.execute(select(Board.owner_id).where(Board.id == board_id))
+    if result.scalar_one_or_none() == user_id:
         raise HTTPException(status_code=400, detail="Cannot remove board owner")
-    member = db.query(BoardMember).filter(
+    result = await db.execute(delete(BoardMember).where(
         BoardMember.board_id == board_id,
         BoardMember.user_id == user_id
-    ).first()
-    if not member:
+    ))
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Member not found")
-    db.delete(member)
-    db.commit()
-    await manager.broadcast({"type": "member_removed", "board_id": board_id, "user_id": user_id}, str(board_id))
+    version = await bump_board_version(db, board_id, [("member", user_id, "delete")])
+    await db.commit()
+    await invalidate_permissions(db, board_id, user_id)
+    await manager.revoke(str(board_id), user_id)
+    await manager.broadcast(serialize_event({"type": "member_removed", "board_id": board_id, "user_id": user_id}, version), str(board_id))
     return None
-@app.get("/boards/{board_id}/lists", response_model=List[ListResponse])
+@app.get("/boards/{board_id}/lists", response_model=list[ListResponse])
 async def get_board_lists(
     board_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    spec: Optional[dict] = Depends(fieldset("list")),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    check_board_permission(board_id, current_user, db)
-    lists = db.query(List).filter(List.board_id == board_id).order_by(List.position).all()
-    return lists
+    await check_board_permission(board_id, current_user, db)
+    if spec is not None:
+        rows, next_cursor = await paginate(
+            db,
+            select_fields("list", spec, List.position).where(List.board_id == board_id),
+            (List.position, List.id),
+            cursor,
+            limit,
+            scalars=False
+        )
+        lists = await expand_fields(db, "list", spec, rows)
+        return json_response(lists, cursor_headers(next_cursor))
+    lists, next_cursor = await paginate(
+        db,
+        select(List).where(List.board_id == board_id).options(*LIST_LOAD_OPTIONS),
+        (List.position, List.id),
+        cursor,
+        limit
+    )
+    return render_response(list[ListResponse], lists, cursor_headers(next_cursor))
 @app.post("/boards/{board_id}/lists", response_model=ListResponse)
 async def create_list(
     board_id: int,
     list_data: ListCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    check_board_permission(board_id, current_user, db)
-    max_position = db.query(List).filter(List.board_id == board_id).count()
+    await check_board_permission(board_id, current_user, db)
+    position = await rank_for_index(db, List, List.board_id, board_id, None)
     db_list = List(
         name=list_data.name,
         board_id=board_id,
-        position=list_data.position if list_data.position is not None else max_position
+        position=position,
+        cards=[]
     )
     db.add(db_list)
-    db.commit()
-    db.refresh(db_list)
-    await manager.broadcast({"type": "list_created", "board_id": board_id, "list": db_list.id}, str(board_id))
+    await db.flush()
+    version = await bump_board_version(db, board_id, [("list", db_list.id, "upsert")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "list_created", "board_id": board_id, "list": db_list}, version), str(board_id))
+    if needs_rebalance(position):
+        background_tasks.add_task(rebalance_lists, board_id)
     return db_list
 @app.get("/lists/{list_id}", response_model=ListResponse)
 async def get_list(
     list_id: int,
+    spec: Optional[dict] = Depends(fieldset("list")),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db)
-    return list_item
+    if spec is not None:
+        result = await db.execute(select_fields("list", spec, List.board_id).where(List.id == list_id))
+        rows = result.mappings().all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="List not found")
+        await check_board_permission(rows[0]["board_id"], current_user, db)
+        lists = await expand_fields(db, "list", spec, rows)
+        return json_response(lists[0])
+    list_item = await get_list_or_404(db, list_id, *LIST_LOAD_OPTIONS)
+    await check_board_permission(list_item.board_id, current_user, db)
+    return render_response(ListResponse, list_item)
 @app.put("/lists/{list_id}", response_model=ListResponse)
 async def update_list(
     list_id: int,
     list_update: ListUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db)
+    list_item = await get_list_or_404(db, list_id, *LIST_LOAD_OPTIONS)
+    await check_board_permission(list_item.board_id, current_user, db)
     if list_update.name is not None:
         list_item.name = list_update.name
     if list_update.position is not None:
-        list_item.position = list_update.position
-    db.commit()
-    db.refresh(list_item)
-    await manager.broadcast({"type": "list_updated", "list_id": list_id}, str(list_item.board_id))
+        list_item.position = await rank_for_index(
+            db, List, List.board_id, list_item.board_id, list_update.position, exclude_id=list_id
+        )
+        if needs_rebalance(list_item.position):
+            background_tasks.add_task(rebalance_lists, list_item.board_id)
+    changes, event = with_rebalanced(
+        db, list_item.board_id, [("list", list_id, "upsert")], {"type": "list_updated", "list_id": list_id, "list": list_item}
+    )
+    version = await bump_board_version(db, list_item.board_id, changes)
+    await db.commit()
+    await manager.broadcast(serialize_event(event, version), str(list_item.board_id))
     return list_item
 @app.delete("/lists/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_list(
     list_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db, require_admin=True)
+    list_item = await get_list_or_404(db, list_id)
+    await check_board_permission(list_item.board_id, current_user, db, require_admin=True)
     board_id = list_item.board_id
-    await manager.broadcast({"type": "list_deleted", "list_id": list_id}, str(board_id))
-    db.query(Card).filter(Card.list_id == list_id).delete()
-    db.delete(list_item)
-    db.commit()
+    await db.execute(delete(Card).where(Card.list_id == list_id))
+    await db.execute(delete(List).where(List.id == list_id))
+    version = await bump_board_version(db, board_id, [("list", list_id, "delete")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "list_deleted", "list_id": list_id}, version), str(board_id))
     return None
 @app.post("/lists/reorder", status_code=status.HTTP_204_NO_CONTENT)
 async def reorder_lists(
-    reorder_data: list = Body(...),
+    reorder_data: list[ReorderItem] = Body(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    if not reorder_data or len(reorder_data) == 0:
+    if not reorder_data:
         raise HTTPException(status_code=400, detail="No lists to reorder")
-    board_id = None
-    for item in reorder_data:
-        list_item = db.query(List).filter(List.id == item['id']).first()
-        if not list_item:
-            raise HTTPException(status_code=404, detail=f"List {item['id']} not found")
-        if board_id is None:
-            board_id = list_item.board_id
-        elif list_item.board_id != board_id:
-            raise HTTPException(status_code=400, detail="All lists must belong to the same board")
-        check_board_permission(list_item.board_id, current_user, db)
-    for item in reorder_data:
-        db.query(List).filter(List.id == item['id']).update({"position": item['position']})
-    db.commit()
-    await manager.broadcast({"type": "lists_reordered", "board_id": board_id}, str(board_id))
+    ordered_ids = [item.id for item in sorted(reorder_data, key=lambda item: item.position)]
+    result = await db.execute(select(List.id, List.board_id).where(List.id.in_(ordered_ids)))
+    board_ids = dict(result.all())
+    missing = [list_id for list_id in ordered_ids if list_id not in board_ids]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"List {missing[0]} not found")
+    if len(set(board_ids.values())) > 1:
+        raise HTTPException(status_code=400, detail="All lists must belong to the same board")
+    board_id = board_ids[ordered_ids[0]]
+    await check_board_permission(board_id, current_user, db)
+    positions = dict(zip(ordered_ids, initial_ranks(len(ordered_ids))))
+    await write_positions(db, List, positions)
+    version = await bump_board_version(db, board_id, [("list", list_id, "upsert") for list_id in ordered_ids])
+    await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "lists_reordered", "board_id": board_id, "positions": positions}, version), str(board_id)
+    )
     return None
-@app.get("/lists/{list_id}/cards", response_model=List[CardResponse])
+@app.get("/lists/{list_id}/cards", response_model=list[CardResponse])
 async def get_list_cards(
     list_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    spec: Optional[dict] = Depends(fieldset("card")),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db)
-    cards = db.query(Card).filter(Card.list_id == list_id).order_by(Card.position).all()
-    return cards
+    list_item = await get_list_or_404(db, list_id)
+    await check_board_permission(list_item.board_id, current_user, db)
+    if spec is not None:
+        rows, next_cursor = await paginate(
+            db,
+            select_fields("card", spec, Card.position).where(Card.list_id == list_id),
+            (Card.position, Card.id),
+            cursor,
+            limit,
+            scalars=False
+        )
+        cards = await expand_fields(db, "card", spec, rows)
+        return json_response(cards, cursor_headers(next_cursor))
+    cards, next_cursor = await paginate(
+        db,
+        select(Card).where(Card.list_id == list_id).options(*CARD_LOAD_OPTIONS),
+        (Card.position, Card.id),
+        cursor,
+        limit
+    )
+    return render_response(list[CardResponse], cards, cursor_headers(next_cursor))
 @app.post("/lists/{list_id}/cards", response_model=CardResponse)
 async def create_card(
     list_id: int,
     card_data: CardCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db)
-    max_position = db.query(Card).filter(Card.list_id == list_id).count()
+    list_item = await get_list_or_404(db, list_id)
+    await check_board_permission(list_item.board_id, current_user, db)
+    position = await rank_for_index(db, Card, Card.list_id, list_id, None)
     db_card = Card(
         title=card_data.title,
         description=card_data.description,
         list_id=list_id,
-        position=card_data.position if card_data.position is not None else max_position,
-        assigned_to=card_data.assigned_to,
-        due_date=card_data.due_date
+        board_id=list_item.board_id,
+        position=position,
+        due_date=card_data.due_date,
+        labels=[],
+        comments=[],
+        assignees=[]
     )
     db.add(db_card)
-    db.commit()
-    db.refresh(db_card)
-    await manager.broadcast({"type": "card_created", "list_id": list_id, "card": db_card.id}, str(list_item.board_id))
+    await db.flush()
+    version = await bump_board_version(db, list_item.board_id, [("card", db_card.id, "upsert")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "card_created", "list_id": list_id, "card": db_card}, version), str(list_item.board_id))
+    if needs_rebalance(position):
+        background_tasks.add_task(rebalance_cards, list_item.board_id, list_id)
     return db_card
 @app.get("/cards/{card_id}", response_model=CardResponse)
 async def get_card(
     card_id: int,
+    spec: Optional[dict] = Depends(fieldset("card")),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    check_board_permission(list_item.board_id, current_user, db)
-    return card
+    if spec is not None:
+        result = await db.execute(select_fields("card", spec, Card.board_id).where(Card.id == card_id))
+        rows = result.mappings().all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Card not found")
+        await check_board_permission(rows[0]["board_id"], current_user, db)
+        cards = await expand_fields(db, "card", spec, rows)
+        return json_response(cards[0])
+    card = await get_card_or_404(db, card_id, *CARD_LOAD_OPTIONS)
+    await check_board_permission(card.board_id, current_user, db)
+    return render_response(CardResponse, card)
 @app.put("/cards/{card_id}", response_model=CardResponse)
 async def update_card(
     card_id: int,
     card_update: CardUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    check_board_permission(list_item.board_id, current_user, db)
-    if card_update.title is not None:
-        card.title = card_update.title
-    if card_update.description is not None:
-        card.description = card_update.description
-    if card_update.position is not None:
-        card.position = card_update.position
-    if card_update.assigned_to is not None:
-        card.assigned_to = card_update.assigned_to
-    if card_update.due_date is not None:
-        card.due_date = card_update.due_date
-    db.commit()
-    db.refresh(card)
-    await manager.broadcast({"type": "card_updated", "card_id": card_id}, str(list_item.board_id))
+    card = await get_card_or_404(db, card_id, *CARD_LOAD_OPTIONS)
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    card, changes, event = await apply_card_update(db, card, card_update)
+    changes, event = with_rebalanced(db, board_id, changes, event)
+    version = await bump_board_version(db, board_id, changes)
+    await db.commit()
+    await manager.broadcast(serialize_event(event, version), str(board_id))
+    if needs_rebalance(card.position):
+        background_tasks.add_task(rebalance_cards, board_id, card.list_id)
     return card
 @app.delete("/cards/{card_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_card(
     card_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
-    await manager.broadcast({"type": "card_deleted", "card_id": card_id}, str(board_id))
-    db.delete(card)
-    db.commit()
+    card = await get_card_or_404(db, card_id)
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    await db.execute(delete(Card).where(Card.id == card_id))
+    version = await bump_board_version(db, board_id, [("card", card_id, "delete")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "card_deleted", "card_id": card_id, "list_id": card.list_id}, version), str(board_id))
     return None
 @app.post("/cards/{card_id}/move", status_code=status.HTTP_204_NO_CONTENT)
 async def move_card(
     card_id: int,
     move_data: CardMove,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    check_board_permission(list_item.board_id, current_user, db)
-    new_list = db.query(List).filter(List.id == move_data.new_list_id).first()
-    if not new_list:
-        raise HTTPException(status_code=404, detail="Target list not found")
-    check_board_permission(new_list.board_id, current_user, db)
-    if new_list.board_id != list_item.board_id:
-        raise HTTPException(status_code=400, detail="Target list must belong to the same board")
-    card.list_id = move_data.new_list_id
-    card.position = move_data.new_position
-    db.commit()
-    await manager.broadcast({
-        "type": "card_moved",
-        "card_id": card_id,
-        "new_list_id": move_data.new_list_id,
-        "new_position": move_data.new_position
-    }, str(list_item.board_id))
+    card = await get_card_or_404(db, card_id)
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    card, changes, event = await apply_card_move(db, card, move_data)
+    changes, event = with_rebalanced(db, board_id, changes, event)
+    version = await bump_board_version(db, board_id, changes)
+    await db.commit()
+    await manager.broadcast(serialize_event(event, version), str(board_id))
+    if needs_rebalance(card.position):
+        background_tasks.add_task(rebalance_cards, board_id, card.list_id)
     return None
 @app.post("/lists/{list_id}/cards/reorder", status_code=status.HTTP_204_NO_CONTENT)
 async def reorder_cards(
     list_id: int,
-    reorder_data: list = Body(...),
+    reorder_data: list[ReorderItem] = Body(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    list_item = db.query(List).filter(List.id == list_id).first()
-    if not list_item:
-        raise HTTPException(status_code=404, detail="List not found")
-    check_board_permission(list_item.board_id, current_user, db)
-    for item in reorder_data:
-        card = db.query(Card).filter(Card.id == item['id']).first()
-        if not card:
-            raise HTTPException(status_code=404, detail=f"Card {item['id']} not found")
-        if card.list_id != list_id:
-            raise HTTPException(status_code=400, detail=f"Card {item['id']} does not belong to this list")
-    for item in reorder_data:
-        db.query(Card).filter(Card.id == item['id']).update({"position": item['position']})
-    db.commit()
-    await manager.broadcast({"type": "cards_reordered", "list_id": list_id}, str(list_item.board_id))
+    if not reorder_data:
+        raise HTTPException(status_code=400, detail="No cards to reorder")
+    list_item = await get_list_or_404(db, list_id)
+    await check_board_permission(list_item.board_id, current_user, db)
+    ordered_ids = [item.id for item in sorted(reorder_data, key=lambda item: item.position)]
+    result = await db.execute(select(Card.id, Card.list_id).where(Card.id.in_(ordered_ids)))
+    list_ids = dict(result.all())
+    for card_id in ordered_ids:
+        if card_id not in list_ids:
+            raise HTTPException(status_code=404, detail=f"Card {card_id} not found")
+        if list_ids[card_id] != list_id:
+            raise HTTPException(status_code=400, detail=f"Card {card_id} does not belong to this list")
+    positions = dict(zip(ordered_ids, initial_ranks(len(ordered_ids))))
+    await write_positions(db, Card, positions)
+    version = await bump_board_version(db, list_item.board_id, [("card", card_id, "upsert") for card_id in ordered_ids])
+    await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "cards_reordered", "list_id": list_id, "positions": positions}, version), str(list_item.board_id)
+    )
     return None
-@app.get("/cards/{card_id}/labels", response_model=List[LabelResponse])
+@app.get("/cards/{card_id}/labels", response_model=list[LabelResponse])
 async def get_card_labels(
     card_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    check_board_permission(list_item.board_id, current_user, db)
-    return card.labels
+    await check_board_permission(await get_card_board_id(db, card_id), current_user, db)
+    result = await db.execute(
+        select(*LABEL_COLUMNS)
+        .join(card_labels_table, card_labels_table.c.label_id == Label.id)
+        .where(card_labels_table.c.card_id == card_id)
+        .order_by(Label.id)
+    )
+    return render_response(list[LabelResponse], result.all())
 @app.post("/cards/{card_id}/labels", response_model=LabelResponse)
 async def add_label_to_card(
     card_id: int,
     label_data: LabelCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
-    label = db.query(Label).filter(
-        Label.name == label_data.name,
-        Label.color == label_data.color,
-        Label.board_id == board_id
-    ).first()
-    if not label:
-        label = Label(name=label_data.name, color=label_data.color, board_id=board_id)
-        db.add(label)
-        db.commit()
-        db.refresh(label)
-    if label not in card.labels:
-        card.labels.append(label)
-        db.commit()
-    await manager.broadcast({"type": "label_added_to_card", "card_id": card_id, "label": label.id}, str(board_id))
+    card = await get_card_or_404(db, card_id, selectinload(Card.labels))
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    label, changes, event = await apply_label_add(db, card, label_data)
+    version = await bump_board_version(db, board_id, changes)
+    await db.commit()
+    await manager.broadcast(serialize_event(event, version), str(board_id))
     return label
 @app.delete("/cards/{card_id}/labels/{label_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_label_from_card(
     card_id: int,
     label_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
-    label = db.query(Label).filter(Label.id == label_id).first()
-    if not label:
-        raise HTTPException(status_code=404, detail="Label not found")
-    if label in card.labels:
-        card.labels.remove(label)
-        db.commit()
-    await manager.broadcast({"type": "label_removed_from_card", "card_id": card_id, "label": label_id}, str(board_id))
+    card = await get_card_or_404(db, card_id, selectinload(Card.labels))
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    _, changes, event = await apply_label_remove(db, card, label_id)
+    if changes:
+        version = await bump_board_version(db, board_id, changes)
+        await db.commit()
+        await manager.broadcast(serialize_event(event, version), str(board_id))
     return None
-@app.get("/cards/{card_id}/comments", response_model=List[CommentResponse])
+@app.get("/cards/{card_id}/comments", response_model=list[CommentResponse])
 async def get_card_comments(
     card_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    check_board_permission(list_item.board_id, current_user, db)
-    comments = db.query(Comment).filter(Comment.card_id == card_id).order_by(Comment.created_at.desc()).all()
-    return comments
+    await check_board_permission(await get_card_board_id(db, card_id), current_user, db)
+    rows, next_cursor = await paginate(
+        db,
+        select(*COMMENT_COLUMNS, *COMMENT_AUTHOR_COLUMNS)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.card_id == card_id),
+        (Comment.created_at, Comment.id),
+        cursor,
+        limit,
+        descending=True,
+        scalars=False
+    )
+    return render_response(list[CommentResponse], [comment_dict(row) for row in rows], cursor_headers(next_cursor))
 @app.post("/cards/{card_id}/comments", response_model=CommentResponse)
 async def create_comment(
     card_id: int,
     comment_data: CommentCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    card = db.query(Card).filter(Card.id == card_id).first()
-    if not card:
-        raise HTTPException(status_code=404, detail="Card not found")
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
-    comment = Comment(content=comment_data.content, card_id=card_id, author_id=current_user.id)
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    comment.author = current_user
-    await manager.broadcast({"type": "comment_created", "card_id": card_id, "comment": comment.id}, str(board_id))
+    card = await get_card_or_404(db, card_id)
+    board_id = card.board_id
+    await check_board_permission(board_id, current_user, db)
+    comment, changes, event = await apply_comment_create(db, card, comment_data, current_user)
+    version = await bump_board_version(db, board_id, changes)
+    await db.commit()
+    set_committed_value(comment, "user", current_user)
+    await manager.broadcast(serialize_event(event, version), str(board_id))
     return comment
 @app.put("/comments/{comment_id}", response_model=CommentResponse)
 async def update_comment(
     comment_id: int,
     comment_update: CommentUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    result = await db.execute(select(Comment).where(Comment.id == comment_id).options(selectinload(Comment.user)))
+    comment = result.scalar_one_or_none()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
-    card = db.query(Card).filter(Card.id == comment.card_id).first()
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
+    result = await db.execute(select(Card.board_id).where(Card.id == comment.card_id))
+    board_id = result.scalar_one()
+    await check_board_permission(board_id, current_user, db)
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only edit your own comments")
     comment.content = comment_update.content
-    db.commit()
-    db.refresh(comment)
-    await manager.broadcast({"type": "comment_updated", "comment_id": comment_id}, str(board_id))
+    version = await bump_board_version(db, board_id, [("comment", comment_id, "upsert")])
+    await db.commit()
+    await manager.broadcast(serialize_event({"type": "comment_updated", "comment_id": comment_id, "comment": comment}, version), str(board_id))
     return comment
 @app.delete("/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_comment(
     comment_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    result = await db.execute(select(Comment).where(Comment.id == comment_id))
+    comment = result.scalar_one_or_none()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
-    card = db.query(Card).filter(Card.id == comment.card_id).first()
-    list_item = db.query(List).filter(List.id == card.list_id).first()
-    board_id = list_item.board_id
-    check_board_permission(board_id, current_user, db)
+    result = await db.execute(select(Card.board_id).where(Card.id == comment.card_id))
+    board_id = result.scalar_one()
+    await check_board_permission(board_id, current_user, db)
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only delete your own comments")
-    await manager.broadcast({"type": "comment_deleted", "comment_id": comment_id}, str(board_id))
-    db.delete(comment)
-    db.commit()
+    await db.execute(delete(Comment).where(Comment.id == comment_id))
+    version = await bump_board_version(db, board_id, [("comment", comment_id, "delete")])
+    await db.commit()
+    await manager.broadcast(
+        serialize_event({"type": "comment_deleted", "comment_id": comment_id, "card_id": comment.card_id}, version), str(board_id)
+    )
     return None
+@app.get("/health/db")
+async def get_database_health():
+    return pool_stats()
 @app.websocket("/ws/boards/{board_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     board_id: str,
-    token: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    token: Optional[str] = Query(None)
 ):
     if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
-    payload = verify_token(token, token_type="access")
-    if not payload:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
-    username = payload.get("sub")
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-        return
     try:
-        check_board_permission(int(board_id), user, db)
-    except:
+        payload = verify_token(token, token_type="access")
+    except HTTPException:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
-    await manager.connect(websocket, board_id)
+    user_id = payload.get("sub")
+    async with SessionLocal() as db:
+        user = await resolve_user(db, user_id) if user_id else None
+        if not user:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        try:
+            await check_board_permission(int(board_id), user, db)
+        except (HTTPException, ValueError):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    connection = await manager.connect(websocket, board_id, user.id, payload.get("exp"))
     try:
         while True:
-            data = await websocket.receive_json()
-            await manager.broadcast(data, board_id)
+            await manager.receive(connection)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, board_id)
-app.mount("/assets", StaticFiles(directory="dist/assets"), name="assets")
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
-    file_path = f"dist/{full_path}"
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
-    return FileResponse("dist/index.html")
\ No newline at end of file
+async def serve_frontend(full_path: str, request: Request):
+    return static_assets.respond(full_path, request)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_STALE_AFTER = float(os.getenv("METRICS_STALE_AFTER", "30"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+def _series(name: str, labelnames: tuple, labels: tuple) -> str:
+    if not labelnames:
+        return name
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(labelnames, labels))
+    return f"{name}{{{pairs}}}"
+def _with_pid(series: str, pid: str) -> str:
+    if series.endswith("}"):
+        return f'{series[:-1]},pid="{pid}"}}'
+    return f'{series}{{pid="{pid}"}}'
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+class Metric:
+    kind = "untyped"
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+        registry.register(self)
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+    def replace(self, values: dict[tuple, float]):
+        self.values = values
+    def samples(self) -> dict[str, float]:
+        return {_series(self.name, self.labelnames, labels): value for labels, value in self.values.items()}
+class Counter(Metric):
+    kind = "counter"
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+class Gauge(Counter):
+    kind = "gauge"
+    def dec(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+class Histogram(Metric):
+    kind = "histogram"
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+    def observe(self, value: float, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 3)
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+    def samples(self) -> dict[str, float]:
+        samples = {}
+        bucket_labels = self.labelnames + ("le",)
+        for labels, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry):
+                cumulative += count
+                samples[_series(f"{self.name}_bucket", bucket_labels, labels + (bound,))] = cumulative
+            samples[_series(f"{self.name}_sum", self.labelnames, labels)] = entry[-2]
+            samples[_series(f"{self.name}_count", self.labelnames, labels)] = entry[-1]
+        return samples
+class MetricsRegistry:
+    def __init__(self, directory: str = METRICS_DIR):
+        self.directory = directory
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+        self.flush_task: Optional[asyncio.Task] = None
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+    def add_collector(self, collector: Callable[[], None]):
+        self.collectors.append(collector)
+    def snapshot(self) -> dict[str, dict]:
+        for collector in self.collectors:
+            collector()
+        return {
+            metric.name: {"type": metric.kind, "help": metric.documentation, "samples": metric.samples()}
+            for metric in self.metrics
+        }
+    def write(self) -> dict[str, dict]:
+        snapshot = self.snapshot()
+        if self.directory:
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w") as handle:
+                json.dump(snapshot, handle)
+            os.replace(temporary, self.path)
+        return snapshot
+    def gather(self) -> dict[str, dict]:
+        snapshot = self.write()
+        if not self.directory:
+            return snapshot
+        merged: dict[str, dict] = {}
+        cutoff = time.time() - METRICS_STALE_AFTER
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json") or entry.stat().st_mtime < cutoff:
+                continue
+            try:
+                with open(entry.path) as handle:
+                    worker = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            pid = entry.name[:-len(".json")]
+            for name, family in worker.items():
+                target = merged.setdefault(name, {"type": family["type"], "help": family["help"], "samples": {}})
+                for series, value in family["samples"].items():
+                    if family["type"] == "gauge":
+                        series = _with_pid(series, pid)
+                    target["samples"][series] = target["samples"].get(series, 0) + value
+        return merged
+    def render(self) -> str:
+        lines = []
+        for name, family in self.gather().items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            lines.extend(f"{series} {_format(value)}" for series, value in family["samples"].items())
+        return "\n".join(lines) + "\n"
+    async def start(self):
+        if self.directory and self.flush_task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.flush_task = asyncio.create_task(self._flush_forever())
+    async def stop(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+    async def _flush_forever(self):
+        while True:
+            self.write()
+            await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+registry = MetricsRegistry()
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.", ("method",))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+http_responses = Counter("http_responses_total", "HTTP responses by route template and status code.", ("method", "route", "status"))
+ws_connections = Gauge("ws_connections", "Open websocket connections per board.", ("board_id",))
+ws_broadcast_fanout = Histogram("ws_broadcast_fanout", "Local connections each broadcast frame is delivered to.", buckets=FANOUT_BUCKETS)
+ws_send_latency = Histogram("ws_send_latency_seconds", "Time spent writing a frame to a websocket.")
+ws_dropped_frames = Counter("ws_dropped_frames_total", "Frames dropped by slow-consumer policies.")
+ws_evicted_connections = Counter("ws_evicted_connections_total", "Websocket connections closed by the server.")
+ws_events_published = Counter("ws_events_published_total", "Board events handed to the broadcast backend.")
+ws_frames_published = Counter("ws_frames_published_total", "Frames published after batching and coalescing.")
+ws_rate_limited_messages = Counter("ws_rate_limited_messages_total", "Inbound websocket messages rejected by the rate limit.")
+db_pool_connections = Gauge("db_pool_connections", "Database pool connections by state.", ("pool", "state"))
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Database pool checkouts.", ("pool",))
+db_pool_checkout_timeouts = Counter("db_pool_checkout_timeouts_total", "Database pool checkouts that timed out.", ("pool",))
+db_pool_checkout_wait = Counter("db_pool_checkout_wait_seconds_total", "Time spent waiting for database pool checkouts.", ("pool",))
+db_replica_healthy = Gauge("db_replica_healthy", "Whether a read replica passed its last health check.", ("pool",))
@@ -1,10 +1,15 @@
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+import asyncio
 import os
+from cache import TTLCache
 from database import get_db
 from models import User
 from schemas import Token, TokenRefresh
@@ -12,7 +17,66 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "60"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
 security = HTTPBearer()
+BCRYPT_MAX_PASSWORD_BYTES = 72
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending_password_jobs = 0
+_dummy_hash: Optional[str] = None
+identity_cache = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+async def _run_password_job(func, *args):
+    global _pending_password_jobs
+    if _pending_password_jobs >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending_password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        _pending_password_jobs -= 1
+def _password_bytes(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+def _hash_password(password: str) -> str:
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("ascii")
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    try:
+        verified = bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode("ascii"))
+    except ValueError:
+        return False, None
+    if not verified:
+        return False, None
+    if int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS:
+        return True, _hash_password(plain_password)
+    return True, None
+async def get_password_hash(password: str) -> str:
+    return await _run_password_job(_hash_password, password)
+async def verify_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await _run_password_job(_verify_and_update, plain_password, hashed_password)
+async def verify_dummy_password(password: str):
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash(os.urandom(16).hex())
+    await verify_password(password, _dummy_hash)
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if user is None:
+        await verify_dummy_password(password)
+        return None
+    verified, new_hash = await verify_password(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -42,58 +106,75 @@ def verify_token(token: str, token_type: str = "access"):
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+async def get_user_by_id(db: AsyncSession, user_id) -> Optional[User]:
+    result = await db.execute(select(User).where(User.id == int(user_id)))
+    return result.scalar_one_or_none()
+async def resolve_user(db: AsyncSession, user_id) -> Optional[User]:
+    user_id = int(user_id)
+    user = identity_cache.get(user_id)
+    if user is None:
+        user = await get_user_by_id(db, user_id)
+        if user is None:
+            return None
+        db.expunge(user)
+        identity_cache.set(user_id, user)
+    return user
+def invalidate_user(user_id: int):
+    identity_cache.pop(user_id)
+def get_token_payload(request: Request) -> Optional[dict]:
+    return getattr(request.state, "token_payload", None)
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    token = credentials.credentials
-    payload = verify_token(token, "access")
-    user_id: Optional[int] = payload.get("sub")
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    payload = get_token_payload(request) or verify_token(credentials.credentials, "access")
+    user_id: Optional[str] = payload.get("sub")
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await resolve_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    request.state.user = user
     return user
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
-    if not hasattr(current_user, "is_active") or not current_user.is_active:
+    if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 async def get_current_user_optional(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None
-    token = auth_header.replace("Bearer ", "")
-    try:
-        payload = verify_token(token, "access")
-        user_id: Optional[int] = payload.get("sub")
-        if user_id is None:
-            return None
-        user = db.query(User).filter(User.id == user_id).first()
+    user = getattr(request.state, "user", None)
+    if user is not None:
         return user
-    except HTTPException:
+    payload = get_token_payload(request)
+    if payload is None or payload.get("sub") is None:
         return None
-def rotate_refresh_token(refresh_token: str, db: Session):
+    user = await resolve_user(db, payload["sub"])
+    request.state.user = user
+    return user
+async def rotate_refresh_token(refresh_token: str, db: AsyncSession):
     payload = verify_token(refresh_token, "refresh")
-    user_id: Optional[int] = payload.get("sub")
+    user_id: Optional[str] = payload.get("sub")
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await resolve_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -109,25 +190,17 @@ def rotate_refresh_token(refresh_token: str, db: Session):
 def setup_auth(app):
     @app.middleware("http")
     async def auth_middleware(request: Request, call_next):
+        request.state.user = None
+        request.state.token_payload = None
         if request.url.path in ["/login", "/register", "/docs", "/openapi.json", "/redoc"]:
             response = await call_next(request)
             return response
-        request.state.user = None
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.replace("Bearer ", "")
             try:
-                payload = verify_token(token, "access")
-                user_id = payload.get("sub")
-                if user_id:
-                    db = next(get_db())
-                    try:
-                        user = db.query(User).filter(User.id == user_id).first()
-                        if user:
-                            request.state.user = user
-                    finally:
-                        db.close()
+                request.state.token_payload = verify_token(token, "access")
             except HTTPException:
                 pass
         response = await call_next(request)
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,143 @@
+import gzip
+import os
+import time
+from typing import Optional
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from static_assets import accepted_encodings
+try:
+    import brotli
+except ImportError:
+    brotli = None
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_MAX_SIZE = int(os.getenv("COMPRESSION_MAX_SIZE", str(16 * 1024 * 1024)))
+COMPRESSION_THREAD_SIZE = int(os.getenv("COMPRESSION_THREAD_SIZE", str(64 * 1024)))
+COMPRESSION_LOAD_INTERVAL = float(os.getenv("COMPRESSION_LOAD_INTERVAL", "1"))
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+COMPRESSION_LEVELS = (
+    (0.5, 6, 5),
+    (1.0, 4, 3),
+    (float("inf"), 1, 1),
+)
+_load_sample = [float("-inf"), 0.0]
+def current_load() -> float:
+    now = time.monotonic()
+    if now - _load_sample[0] >= COMPRESSION_LOAD_INTERVAL:
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            load = 0.75
+        _load_sample[0], _load_sample[1] = now, load
+    return _load_sample[1]
+def compression_levels() -> tuple[int, int]:
+    load = current_load()
+    for limit, gzip_level, brotli_quality in COMPRESSION_LEVELS:
+        if load < limit:
+            return gzip_level, brotli_quality
+    return COMPRESSION_LEVELS[-1][1:]
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+def compress(body: bytes, encoding: str) -> bytes:
+    gzip_level, brotli_quality = compression_levels()
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+def should_compress(status_code: int, headers: Headers) -> bool:
+    if status_code < 200 or status_code in (204, 304):
+        return False
+    if "content-encoding" in headers:
+        return False
+    if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+        return False
+    length = headers.get("content-length")
+    return length is not None and COMPRESSION_MIN_SIZE <= int(length) <= COMPRESSION_MAX_SIZE
+def encoded_etag(etag: str, encoding: str) -> str:
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+def decoded_etags(if_none_match: str) -> str:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    for candidate in list(candidates):
+        for encoding in ENCODINGS:
+            suffix = f'-{encoding}"'
+            if candidate.endswith(suffix):
+                candidates.append(f'{candidate[:-len(suffix)]}"')
+    return ", ".join(candidates)
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = select_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            scope["headers"] = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+            scope["headers"].append((b"if-none-match", decoded_etags(if_none_match).encode("latin-1")))
+        await CompressionResponder(self.app, encoding, if_none_match)(scope, receive, send)
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, if_none_match: Optional[str]):
+        self.app = app
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.chunks: list[bytes] = []
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if message["status"] == 304 and self.if_none_match:
+                self._restore_etag(headers)
+            if should_compress(message["status"], headers):
+                self.start = message
+                return
+        elif message["type"] == "http.response.body" and self.start is not None:
+            self.chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._send_compressed()
+            return
+        await self.send(message)
+    def _restore_etag(self, headers: MutableHeaders):
+        etag = headers.get("etag")
+        if etag:
+            encoded = encoded_etag(etag, self.encoding)
+            if encoded in [candidate.strip() for candidate in self.if_none_match.split(",")]:
+                headers["ETag"] = encoded
+    async def _send_compressed(self):
+        body = b"".join(self.chunks)
+        if len(body) >= COMPRESSION_THREAD_SIZE:
+            compressed = await run_in_threadpool(compress, body, self.encoding)
+        else:
+            compressed = compress(body, self.encoding)
+        if len(compressed) < len(body):
+            headers = MutableHeaders(scope=self.start)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            vary = headers.get("vary")
+            if not vary:
+                headers["Vary"] = "Accept-Encoding"
+            elif "accept-encoding" not in vary.lower():
+                headers["Vary"] = f"{vary}, Accept-Encoding"
+            etag = headers.get("etag")
+            if etag:
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+            body = compressed
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": False})
+def setup_compression(app: FastAPI) -> None:
+    app.add_middleware(CompressionMiddleware)
@@ -11,5 +11,6 @@ def setup_cors(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=["Authorization", "Content-Type"],
+        expose_headers=["ETag", "X-Next-Cursor"],
         max_age=3600,
     )
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import time
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import pool_stats
+from metrics import (
+    CONTENT_TYPE, registry, http_requests_in_flight, http_request_duration, http_responses, ws_connections,
+    ws_dropped_frames, ws_evicted_connections, ws_events_published, ws_frames_published, ws_rate_limited_messages,
+    db_pool_connections, db_pool_checkouts, db_pool_checkout_timeouts, db_pool_checkout_wait, db_replica_healthy,
+)
+from realtime import ConnectionManager
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+POOL_STATES = ("size", "in_use", "idle", "overflow")
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        status_code = 500
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            http_requests_in_flight.dec(method)
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_responses.inc(method, route, str(status_code))
+def setup_metrics(app: FastAPI, manager: ConnectionManager) -> None:
+    def collect_websockets():
+        ws_connections.replace({(board_id,): len(connections) for board_id, connections in manager.active_connections.items()})
+        ws_dropped_frames.set(manager.dropped_frames + sum(
+            connection.dropped for connections in manager.active_connections.values() for connection in connections.values()
+        ))
+        ws_evicted_connections.set(manager.evicted_connections)
+        ws_events_published.set(manager.events_published)
+        ws_frames_published.set(manager.frames_published)
+        ws_rate_limited_messages.set(manager.rate_limited_messages)
+    def collect_pools():
+        for pool, stats in pool_stats().items():
+            for state in POOL_STATES:
+                db_pool_connections.set(stats[state], pool, state)
+            db_pool_checkouts.set(stats["checkouts"], pool)
+            db_pool_checkout_timeouts.set(stats["checkout_timeouts"], pool)
+            db_pool_checkout_wait.set(stats["checkout_wait_seconds_total"], pool)
+            if "healthy" in stats:
+                db_replica_healthy.set(int(stats["healthy"]), pool)
+    registry.add_collector(collect_websockets)
+    registry.add_collector(collect_pools)
+    @app.on_event("startup")
+    async def start_metrics():
+        await registry.start()
+    @app.on_event("shutdown")
+    async def stop_metrics():
+        await registry.stop()
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics(request: Request):
+        if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+        return Response(content=registry.render(), media_type=CONTENT_TYPE)
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,27 @@
+import os
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import QueryStats, query_stats
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+class QueryProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(scope)
+        async def send_wrapper(message: Message) -> None:
+            if DEBUG and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"')
+            await send(message)
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+        stats.report()
+def setup_query_profiling(app: FastAPI) -> None:
+    app.add_middleware(QueryProfilingMiddleware)
@@ -0,0 +1,24 @@
+import math
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_WINDOW
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and "written_at" in state:
+                headers = MutableHeaders(scope=message)
+                headers.append("Set-Cookie", (
+                    f"{READ_YOUR_WRITES_COOKIE}={state['written_at']:.3f}; Max-Age={math.ceil(READ_YOUR_WRITES_WINDOW)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                ))
+            await send(message)
+        await self.app(scope, receive, send_wrapper)
+def setup_read_your_writes(app: FastAPI) -> None:
+    app.add_middleware(ReadYourWritesMiddleware)
@@ -1,16 +1,19 @@
 from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime, Date, Boolean, Table, Index
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, synonym
 from datetime import datetime
+RANK_TYPE = String(255).with_variant(String(255, collation='C'), 'postgresql')
 class Base(DeclarativeBase):
     pass
-board_members_table = Table(
-    'board_members',
-    Base.metadata,
-    Column('board_id', Integer, ForeignKey('boards.id', ondelete='CASCADE'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
-    Index('idx_board_members_board_id', 'board_id'),
-    Index('idx_board_members_user_id', 'user_id'),
-)
+class BoardMember(Base):
+    __tablename__ = 'board_members'
+    __table_args__ = (
+        Index('idx_board_members_board_id', 'board_id'),
+        Index('idx_board_members_user_id', 'user_id'),
+    )
+    board_id: Mapped[int] = mapped_column(Integer, ForeignKey('boards.id', ondelete='CASCADE'), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    is_admin: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+board_members_table = BoardMember.__table__
 card_assignees_table = Table(
     'card_assignees',
     Base.metadata,
@@ -30,8 +33,13 @@ card_labels_table = Table(
 class User(Base):
     __tablename__ = 'users'
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    username: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+    avatar: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     owned_boards: Mapped[list["Board"]] = relationship("Board", back_populates="owner", cascade="all, delete-orphan", foreign_keys="[Board.owner_id]")
     member_boards: Mapped[list["Board"]] = relationship("Board", secondary=board_members_table, back_populates="members")
     comments: Mapped[list["Comment"]] = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
@@ -40,6 +48,10 @@ class Board(Base):
     __tablename__ = 'boards'
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     owner: Mapped["User"] = relationship("User", back_populates="owned_boards", foreign_keys=[owner_id])
     lists: Mapped[list["List"]] = relationship("List", back_populates="board", cascade="all, delete-orphan")
@@ -47,37 +59,51 @@ class Board(Base):
     labels: Mapped[list["Label"]] = relationship("Label", back_populates="board", cascade="all, delete-orphan")
 class List(Base):
     __tablename__ = 'lists'
+    __table_args__ = (
+        Index('idx_lists_board_position', 'board_id', 'position', 'id'),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[str] = mapped_column(RANK_TYPE, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     board_id: Mapped[int] = mapped_column(Integer, ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
     board: Mapped["Board"] = relationship("Board", back_populates="lists", foreign_keys=[board_id])
     cards: Mapped[list["Card"]] = relationship("Card", back_populates="list", cascade="all, delete-orphan")
 class Card(Base):
     __tablename__ = 'cards'
+    __table_args__ = (
+        Index('idx_cards_list_position', 'list_id', 'position', 'id'),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     due_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     attachment_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
-    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[str] = mapped_column(RANK_TYPE, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     list_id: Mapped[int] = mapped_column(Integer, ForeignKey('lists.id', ondelete='CASCADE'), nullable=False, index=True)
     board_id: Mapped[int] = mapped_column(Integer, ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
-    list: Mapped["List"] = relationship("List", back_populates="cards", foreign_keys=[list_id])
     board: Mapped["Board"] = relationship("Board", foreign_keys=[board_id])
     labels: Mapped[list["Label"]] = relationship("Label", secondary=card_labels_table, back_populates="cards")
     comments: Mapped[list["Comment"]] = relationship("Comment", back_populates="card", cascade="all, delete-orphan")
     assignees: Mapped[list["User"]] = relationship("User", secondary=card_assignees_table, back_populates="assigned_cards")
+    list: Mapped["List"] = relationship("List", back_populates="cards", foreign_keys=[list_id])
 class Label(Base):
     __tablename__ = 'labels'
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     color: Mapped[str] = mapped_column(String(7), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     board_id: Mapped[int] = mapped_column(Integer, ForeignKey('boards.id', ondelete='CASCADE'), nullable=False, index=True)
     board: Mapped["Board"] = relationship("Board", back_populates="labels", foreign_keys=[board_id])
     cards: Mapped[list["Card"]] = relationship("Card", secondary=card_labels_table, back_populates="labels")
 class Comment(Base):
     __tablename__ = 'comments'
+    __table_args__ = (
+        Index('idx_comments_card_created', 'card_id', 'created_at', 'id'),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -85,4 +111,18 @@ class Comment(Base):
     card_id: Mapped[int] = mapped_column(Integer, ForeignKey('cards.id', ondelete='CASCADE'), nullable=False, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     card: Mapped["Card"] = relationship("Card", back_populates="comments", foreign_keys=[card_id])
-    user: Mapped["User"] = relationship("User", back_populates="comments", foreign_keys=[user_id])
\ No newline at end of file
+    user: Mapped["User"] = relationship("User", back_populates="comments", foreign_keys=[user_id])
+    author_id = synonym("user_id")
+    author = synonym("user")
+class BoardChange(Base):
+    __tablename__ = 'board_changes'
+    __table_args__ = (
+        Index('idx_board_changes_board_version', 'board_id', 'version'),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    board_id: Mapped[int] = mapped_column(Integer, ForeignKey('boards.id', ondelete='CASCADE'), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    op: Mapped[str] = mapped_column(String(8), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,58 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+def encode_cursor(values) -> str:
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        decoded = []
+        for value, column in zip(values, columns):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            if not isinstance(value, python_type):
+                raise ValueError(cursor)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+def cursor_headers(next_cursor: Optional[str]) -> Optional[dict]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+async def paginate(
+    db: AsyncSession,
+    query,
+    columns,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    scalars: bool = True
+) -> tuple[list, Optional[str]]:
+    if cursor:
+        key = tuple_(*columns)
+        bound = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < bound if descending else key > bound)
+    order = [column.desc() for column in columns] if descending else list(columns)
+    result = await db.execute(query.order_by(*order).limit(limit + 1))
+    items = result.scalars().all() if scalars else result.mappings().all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    if scalars:
+        return items, encode_cursor([getattr(last, column.key) for column in columns])
+    return items, encode_cursor([last[column.key] for column in columns])
@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Board, BoardMember
+from cache import TTLCache
+from database import SessionLocal
+PERMISSION_CACHE_SIZE = int(os.getenv("PERMISSION_CACHE_SIZE", "10000"))
+PERMISSION_CACHE_TTL = float(os.getenv("PERMISSION_CACHE_TTL", "30"))
+ROLE_OWNER = "owner"
+ROLE_ADMIN = "admin"
+ROLE_MEMBER = "member"
+_MISSING = object()
+permission_cache = TTLCache(PERMISSION_CACHE_SIZE, PERMISSION_CACHE_TTL)
+def _request_memo(db: AsyncSession) -> dict:
+    return db.info.setdefault("board_roles", {})
+async def get_board_role(board_id: int, user_id: int, db: AsyncSession) -> Optional[str]:
+    key = (board_id, user_id)
+    memo = _request_memo(db)
+    role = memo.get(key, _MISSING)
+    if role is not _MISSING:
+        return role
+    role = permission_cache.get(key, _MISSING)
+    if role is _MISSING:
+        if db.info.get("replica"):
+            async with SessionLocal() as primary:
+                role = await _resolve_board_role(board_id, user_id, primary)
+        else:
+            role = await _resolve_board_role(board_id, user_id, db)
+        permission_cache.set(key, role)
+    memo[key] = role
+    return role
+async def _resolve_board_role(board_id: int, user_id: int, db: AsyncSession) -> Optional[str]:
+    result = await db.execute(
+        select(Board.owner_id, BoardMember.is_admin)
+        .outerjoin(BoardMember, and_(BoardMember.board_id == Board.id, BoardMember.user_id == user_id))
+        .where(Board.id == board_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+    owner_id, is_admin = row
+    if owner_id == user_id:
+        return ROLE_OWNER
+    if is_admin is None:
+        return None
+    return ROLE_ADMIN if is_admin else ROLE_MEMBER
+async def check_board_permission(board_id: int, user, db: AsyncSession, require_admin: bool = False):
+    role = await get_board_role(board_id, user.id, db)
+    if role is None:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if require_admin and role == ROLE_MEMBER:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return True
+def invalidate_board_permissions(board_id: int, user_id: Optional[int] = None, db: Optional[AsyncSession] = None):
+    if user_id is None:
+        permission_cache.pop_where(lambda key: key[0] == board_id)
+    else:
+        permission_cache.pop((board_id, user_id))
+    if db is not None:
+        memo = _request_memo(db)
+        for key in [key for key in memo if key[0] == board_id and user_id in (None, key[1])]:
+            del memo[key]
+def apply_permission_invalidation(message: dict):
+    if message.get("type") == "resync":
+        permission_cache.clear()
+    elif message.get("type") == "permissions":
+        invalidate_board_permissions(message["board_id"], message.get("user_id"))
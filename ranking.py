@@ -0,0 +1,106 @@
+import os
+from typing import Optional
+from sqlalchemy import select, func, text, update, values, column, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+RANK_REBALANCE_LENGTH = int(os.getenv("RANK_REBALANCE_LENGTH", "32"))
+LEGACY_POSITION_WIDTH = 12
+def _midpoint(a: str, b: Optional[str]) -> str:
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"rank {before!r} must sort before {after!r}")
+    return _midpoint(before or "", after)
+def initial_ranks(count: int) -> list[str]:
+    width = 1
+    while BASE ** width <= count + 1:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value = step * index
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+def needs_rebalance(rank: str) -> bool:
+    return len(rank) > RANK_REBALANCE_LENGTH
+async def write_positions(db: AsyncSession, model, positions: dict[int, str]):
+    if not positions:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        new_positions = values(
+            column("id", Integer), column("position", String), name="new_positions"
+        ).data(list(positions.items()))
+        await db.execute(
+            update(model)
+            .where(model.id == new_positions.c.id)
+            .values(position=new_positions.c.position)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        await db.execute(
+            update(model),
+            [{"id": item_id, "position": position} for item_id, position in positions.items()]
+        )
+async def lock_parent(db: AsyncSession, parent_column, parent_id: int):
+    parent = next(iter(parent_column.foreign_keys)).column.table
+    await db.execute(select(parent.c.id).where(parent.c.id == parent_id).with_for_update())
+async def rebalance_siblings(db: AsyncSession, model, parent_column, parent_id: int, exclude_id: Optional[int] = None) -> dict[int, str]:
+    query = select(model.id).where(parent_column == parent_id).order_by(model.position, model.id)
+    if exclude_id is not None:
+        query = query.where(model.id != exclude_id)
+    result = await db.execute(query)
+    ids = result.scalars().all()
+    positions = dict(zip(ids, initial_ranks(len(ids))))
+    await write_positions(db, model, positions)
+    db.info.setdefault("rebalanced", []).append((model, parent_id, positions))
+    return positions
+async def rank_for_index(
+    db: AsyncSession, model, parent_column, parent_id: int, index: Optional[int], exclude_id: Optional[int] = None
+) -> str:
+    await lock_parent(db, parent_column, parent_id)
+    query = select(model.position).where(parent_column == parent_id)
+    if exclude_id is not None:
+        query = query.where(model.id != exclude_id)
+    if index is None:
+        result = await db.execute(query.with_only_columns(func.max(model.position)))
+        return rank_between(result.scalar_one_or_none(), None)
+    if index <= 0:
+        result = await db.execute(query.with_only_columns(func.min(model.position)))
+        return rank_between(None, result.scalar_one_or_none())
+    result = await db.execute(query.order_by(model.position, model.id).offset(index - 1).limit(2))
+    neighbours = result.scalars().all()
+    if not neighbours:
+        return await rank_for_index(db, model, parent_column, parent_id, None, exclude_id)
+    if len(neighbours) > 1 and neighbours[0] >= neighbours[1]:
+        positions = await rebalance_siblings(db, model, parent_column, parent_id, exclude_id)
+        ranks = list(positions.values())
+        return rank_between(ranks[index - 1], ranks[index] if index < len(ranks) else None)
+    return rank_between(neighbours[0], neighbours[1] if len(neighbours) > 1 else None)
+async def migrate_integer_positions(engine: AsyncEngine):
+    async with engine.begin() as conn:
+        for table in ("lists", "cards"):
+            await conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN position TYPE VARCHAR(255) COLLATE \"C\" "
+                f"USING lpad(position::text, {LEGACY_POSITION_WIDTH}, '0') || 'V'"
+            ))
+if __name__ == "__main__":
+    import asyncio
+    from database import engine
+    asyncio.run(migrate_integer_positions(engine))
@@ -0,0 +1,418 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Hashable, Optional, Union
+from fastapi import WebSocket, WebSocketDisconnect, status
+from pydantic import TypeAdapter, ValidationError
+from metrics import ws_broadcast_fanout, ws_send_latency
+from pubsub import BroadcastBackend, create_broadcast_backend
+from responses import encode_json
+from schemas import ClientMessage
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+WS_BATCH_WINDOW = float(os.getenv("WS_BATCH_WINDOW", "0.025"))
+WS_MAX_MESSAGE_BYTES = int(os.getenv("WS_MAX_MESSAGE_BYTES", "4096"))
+WS_RATE_LIMIT = float(os.getenv("WS_RATE_LIMIT", "20"))
+WS_RATE_BURST = int(os.getenv("WS_RATE_BURST", "40"))
+WS_EPHEMERAL_INTERVAL = float(os.getenv("WS_EPHEMERAL_INTERVAL", "0.05"))
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "20"))
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+THROTTLED_MESSAGES = ("cursor", "drag_preview")
+PING_MESSAGE = {"type": "ping"}
+REVOKED_REASON = "Access revoked"
+INVALIDATION_CHANNEL = "invalidations"
+REVOKE_FRAME_PREFIX = '{"type": "revoke"'
+client_message_adapter = TypeAdapter(ClientMessage)
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+if WS_SLOW_CONSUMER_POLICY not in SLOW_CONSUMER_POLICIES:
+    raise ValueError(f"WS_SLOW_CONSUMER_POLICY must be one of {', '.join(SLOW_CONSUMER_POLICIES)}")
+SUBPROTOCOL_JSON = "kanban.json"
+SUBPROTOCOL_MSGPACK = "kanban.msgpack"
+SUPERSEDING_EVENTS = {
+    "card_updated": "card_id",
+    "card_moved": "card_id",
+    "list_updated": "list_id",
+    "board_updated": "board_id",
+    "comment_updated": "comment_id",
+}
+def revoke_frame(user_id: Optional[int]) -> str:
+    return json.dumps({"type": "revoke", "user_id": user_id})
+def encode_message(message: Union[dict, list]) -> str:
+    return encode_json(message).decode()
+def encode_msgpack(message: Union[dict, list]) -> bytes:
+    return msgpack.packb(message, default=str)
+def negotiate_subprotocol(websocket: WebSocket) -> Optional[str]:
+    offered = websocket.scope.get("subprotocols", [])
+    if SUBPROTOCOL_MSGPACK in offered and msgpack is not None:
+        return SUBPROTOCOL_MSGPACK
+    if SUBPROTOCOL_JSON in offered:
+        return SUBPROTOCOL_JSON
+    return None
+def coalesce_key(message: Union[dict, list]) -> Optional[Hashable]:
+    if not isinstance(message, dict):
+        return None
+    field = SUPERSEDING_EVENTS.get(message.get("type"))
+    if field is None or field not in message:
+        return None
+    return (message["type"], message[field])
+def superseding_key(message: dict) -> Optional[Hashable]:
+    field = SUPERSEDING_EVENTS.get(message.get("type"))
+    if field is None or "version" not in message:
+        return None
+    return (message["type"], message[field])
+def order_by_version(events: list[dict]) -> list[dict]:
+    slots = [index for index, event in enumerate(events) if "version" in event]
+    ordered = list(events)
+    for index, event in zip(slots, sorted((events[index] for index in slots), key=lambda event: event["version"])):
+        ordered[index] = event
+    return ordered
+def collapse_events(events: list[dict]) -> list[dict]:
+    events = order_by_version(events)
+    versions = {event["version"] for event in events if "version" in event}
+    survivors: list[Optional[dict]] = list(events)
+    latest: dict[Hashable, int] = {}
+    for index, event in enumerate(events):
+        key = superseding_key(event)
+        if key is None:
+            continue
+        earlier_index = latest.get(key)
+        latest[key] = index
+        if earlier_index is None:
+            continue
+        earlier = survivors[earlier_index]
+        if earlier["version"] >= event["version"]:
+            continue
+        if all(version in versions for version in range(earlier["version"] + 1, event["version"])):
+            survivors[index] = dict(event, base_version=earlier.get("base_version", earlier["version"] - 1))
+            survivors[earlier_index] = None
+    return [event for event in survivors if event is not None]
+class TokenBucket:
+    def __init__(self, rate: float = WS_RATE_LIMIT, burst: int = WS_RATE_BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    def consume(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+class Connection:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        board_id: str,
+        user_id: Optional[int] = None,
+        subprotocol: Optional[str] = None,
+        expires_at: Optional[float] = None,
+        policy: str = WS_SLOW_CONSUMER_POLICY,
+        max_queue: int = WS_SEND_QUEUE_SIZE
+    ):
+        self.websocket = websocket
+        self.board_id = board_id
+        self.user_id = user_id
+        self.subprotocol = subprotocol
+        self.expires_at = expires_at
+        self.last_seen = time.monotonic()
+        self.binary = subprotocol == SUBPROTOCOL_MSGPACK
+        self.policy = policy
+        self.max_queue = max_queue
+        self.pending: deque[tuple[Optional[Hashable], Union[str, bytes]]] = deque()
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.writer: Optional[asyncio.Task] = None
+        self.bucket = TokenBucket()
+        self.throttled: dict[str, dict] = {}
+        self.throttle_task: Optional[asyncio.Task] = None
+    def enqueue(self, frame: Union[str, bytes], key: Optional[Hashable] = None) -> bool:
+        if len(self.pending) >= self.max_queue:
+            if self.policy == "disconnect":
+                return False
+            self.dropped += 1
+            if self.policy == "coalesce" and key is not None:
+                for index, (queued_key, _) in enumerate(self.pending):
+                    if queued_key == key:
+                        del self.pending[index]
+                        break
+                else:
+                    self.pending.popleft()
+            else:
+                self.pending.popleft()
+        self.pending.append((key, frame))
+        self.wakeup.set()
+        return True
+    async def write_forever(self):
+        while True:
+            while not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+            _, frame = self.pending.popleft()
+            started = time.perf_counter()
+            if isinstance(frame, bytes):
+                await asyncio.wait_for(self.websocket.send_bytes(frame), WS_SEND_TIMEOUT)
+            else:
+                await asyncio.wait_for(self.websocket.send_text(frame), WS_SEND_TIMEOUT)
+            ws_send_latency.observe(time.perf_counter() - started)
+class ConnectionManager:
+    def __init__(self, backend: Optional[BroadcastBackend] = None):
+        self.active_connections: dict[str, dict[WebSocket, Connection]] = {}
+        self.backend = backend or create_broadcast_backend()
+        self.subscribed_boards: set[str] = set()
+        self.subscription_lock = asyncio.Lock()
+        self.pending_events: dict[str, list[dict]] = {}
+        self.flush_tasks: dict[str, asyncio.Task] = {}
+        self.presence: dict[str, dict[int, dict]] = {}
+        self.heartbeat: Optional[asyncio.Task] = None
+        self.invalidation_listeners: list[Callable[[dict], None]] = []
+        self.dropped_frames = 0
+        self.evicted_connections = 0
+        self.idle_connections = 0
+        self.expired_connections = 0
+        self.events_published = 0
+        self.events_coalesced = 0
+        self.frames_published = 0
+        self.rate_limited_messages = 0
+        self.rejected_messages = 0
+    @property
+    def frames_saved(self) -> int:
+        return self.events_published - self.frames_published
+    def add_invalidation_listener(self, listener: Callable[[dict], None]):
+        self.invalidation_listeners.append(listener)
+    async def start(self):
+        await self.backend.start(self.deliver)
+        await self.backend.subscribe(INVALIDATION_CHANNEL)
+        self.heartbeat = asyncio.create_task(self._heartbeat())
+    async def stop(self):
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+        for task in self.flush_tasks.values():
+            task.cancel()
+        self.flush_tasks.clear()
+        for board_id, events in list(self.pending_events.items()):
+            await self._publish(board_id, events)
+        self.pending_events.clear()
+        await self.backend.stop()
+    async def connect(
+        self,
+        websocket: WebSocket,
+        board_id: str,
+        user_id: Optional[int] = None,
+        expires_at: Optional[float] = None
+    ):
+        subprotocol = negotiate_subprotocol(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        connection = Connection(websocket, board_id, user_id, subprotocol, expires_at)
+        connection.writer = asyncio.create_task(self._run_writer(connection))
+        self.active_connections.setdefault(board_id, {})[websocket] = connection
+        await self._sync_subscription(board_id)
+        if self._join(connection):
+            await self.broadcast({"type": "presence", "user_id": user_id, "status": "active"}, board_id)
+        return connection
+    def disconnect(self, websocket: WebSocket, board_id: str):
+        connections = self.active_connections.get(board_id)
+        if connections is None:
+            return None
+        connection = connections.pop(websocket, None)
+        if not connections:
+            del self.active_connections[board_id]
+            asyncio.create_task(self._sync_subscription(board_id))
+        if connection is not None:
+            self.dropped_frames += connection.dropped
+            if connection.writer is not None and connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
+            if connection.throttle_task is not None:
+                connection.throttle_task.cancel()
+            if self._leave(connection):
+                asyncio.create_task(self.broadcast(
+                    {"type": "presence", "user_id": connection.user_id, "status": "offline"}, board_id
+                ))
+        return connection
+    def get_presence(self, board_id: str) -> list[dict]:
+        return [dict(entry) for entry in self.presence.get(board_id, {}).values()]
+    async def broadcast(self, message: dict, board_id: str):
+        if WS_BATCH_WINDOW <= 0:
+            await self._publish(board_id, [message])
+            return
+        self.pending_events.setdefault(board_id, []).append(message)
+        if board_id not in self.flush_tasks:
+            self.flush_tasks[board_id] = asyncio.create_task(self._flush_after(board_id))
+    def send(self, connection: Connection, message: dict):
+        frame = encode_msgpack(message) if connection.binary else encode_message(message)
+        if not connection.enqueue(frame):
+            self.evict(connection, status.WS_1013_TRY_AGAIN_LATER)
+    async def receive(self, connection: Connection):
+        message = await connection.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+        connection.last_seen = time.monotonic()
+        data = message.get("text")
+        if data is None:
+            data = message.get("bytes") or b""
+        size = len(data.encode()) if isinstance(data, str) else len(data)
+        if size > WS_MAX_MESSAGE_BYTES:
+            self.evict(connection, status.WS_1009_MESSAGE_TOO_BIG)
+            raise WebSocketDisconnect(status.WS_1009_MESSAGE_TOO_BIG)
+        if not connection.bucket.consume():
+            self.rate_limited_messages += 1
+            return
+        try:
+            if isinstance(data, bytes) and connection.binary:
+                inbound = client_message_adapter.validate_python(msgpack.unpackb(data))
+            else:
+                inbound = client_message_adapter.validate_json(data)
+        except (ValidationError, ValueError):
+            self.rejected_messages += 1
+            self.send(connection, {"type": "error", "detail": "Invalid message"})
+            return
+        if inbound.type == "pong":
+            return
+        event = dict(inbound.model_dump(mode="json"), user_id=connection.user_id)
+        if inbound.type == "presence":
+            self._set_status(connection, inbound.status)
+        if inbound.type in THROTTLED_MESSAGES:
+            connection.throttled[inbound.type] = event
+            if connection.throttle_task is None:
+                connection.throttle_task = asyncio.create_task(self._flush_throttled(connection))
+        else:
+            await self.broadcast(event, connection.board_id)
+    async def invalidate(self, message: dict):
+        await self.backend.publish(INVALIDATION_CHANNEL, json.dumps(message))
+    async def revoke(self, board_id: str, user_id: Optional[int] = None):
+        self.close_user(board_id, user_id)
+        await self.backend.publish(board_id, revoke_frame(user_id))
+    def close_user(self, board_id: str, user_id: Optional[int] = None):
+        for connection in list(self.active_connections.get(board_id, {}).values()):
+            if user_id is None or connection.user_id == user_id:
+                self.evict(connection, status.WS_1008_POLICY_VIOLATION, REVOKED_REASON)
+    async def deliver(self, board_id: str, frame: str):
+        if board_id == INVALIDATION_CHANNEL:
+            message = json.loads(frame)
+            for listener in self.invalidation_listeners:
+                listener(message)
+            return
+        if frame.startswith(REVOKE_FRAME_PREFIX):
+            self.close_user(board_id, json.loads(frame)["user_id"])
+            return
+        connections = self.active_connections.get(board_id)
+        if not connections:
+            return
+        ws_broadcast_fanout.observe(len(connections))
+        message = None
+        binary_frame = None
+        key = None
+        if WS_SLOW_CONSUMER_POLICY == "coalesce":
+            message = json.loads(frame)
+            key = coalesce_key(message)
+        for connection in list(connections.values()):
+            data = frame
+            if connection.binary:
+                if binary_frame is None:
+                    if message is None:
+                        message = json.loads(frame)
+                    binary_frame = encode_msgpack(message)
+                data = binary_frame
+            if not connection.enqueue(data, key):
+                self.evict(connection, status.WS_1013_TRY_AGAIN_LATER)
+    def evict(self, connection: Connection, code: int = status.WS_1011_INTERNAL_ERROR, reason: Optional[str] = None):
+        if self.disconnect(connection.websocket, connection.board_id) is None:
+            return
+        self.evicted_connections += 1
+        asyncio.create_task(self._close(connection.websocket, code, reason))
+    async def _flush_after(self, board_id: str):
+        await asyncio.sleep(WS_BATCH_WINDOW)
+        self.flush_tasks.pop(board_id, None)
+        events = self.pending_events.pop(board_id, None)
+        if events:
+            await self._publish(board_id, events)
+    async def _publish(self, board_id: str, events: list[dict]):
+        collapsed = collapse_events(events)
+        self.events_published += len(events)
+        self.events_coalesced += len(events) - len(collapsed)
+        self.frames_published += 1
+        message = collapsed[0] if len(collapsed) == 1 else collapsed
+        await self.backend.publish(board_id, encode_message(message))
+    def _join(self, connection: Connection) -> bool:
+        if connection.user_id is None:
+            return False
+        users = self.presence.setdefault(connection.board_id, {})
+        entry = users.get(connection.user_id)
+        joined = entry is None
+        if joined:
+            entry = users[connection.user_id] = {
+                "user_id": connection.user_id,
+                "status": "active",
+                "connections": 0,
+                "updated_at": datetime.utcnow(),
+            }
+        entry["connections"] += 1
+        return joined
+    def _leave(self, connection: Connection) -> bool:
+        users = self.presence.get(connection.board_id)
+        entry = users.get(connection.user_id) if users else None
+        if entry is None:
+            return False
+        entry["connections"] -= 1
+        if entry["connections"] > 0:
+            return False
+        del users[connection.user_id]
+        if not users:
+            del self.presence[connection.board_id]
+        return True
+    def _set_status(self, connection: Connection, presence_status: str):
+        entry = self.presence.get(connection.board_id, {}).get(connection.user_id)
+        if entry is not None:
+            entry["status"] = presence_status
+            entry["updated_at"] = datetime.utcnow()
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            now = time.monotonic()
+            wall_clock = time.time()
+            for connections in list(self.active_connections.values()):
+                for connection in list(connections.values()):
+                    if connection.expires_at is not None and connection.expires_at <= wall_clock:
+                        self.expired_connections += 1
+                        self.evict(connection, status.WS_1008_POLICY_VIOLATION)
+                    elif now - connection.last_seen > WS_IDLE_TIMEOUT:
+                        self.idle_connections += 1
+                        self.evict(connection, status.WS_1001_GOING_AWAY)
+                    else:
+                        self.send(connection, PING_MESSAGE)
+    async def _flush_throttled(self, connection: Connection):
+        await asyncio.sleep(WS_EPHEMERAL_INTERVAL)
+        events, connection.throttled = connection.throttled, {}
+        connection.throttle_task = None
+        for event in events.values():
+            await self.broadcast(event, connection.board_id)
+    async def _sync_subscription(self, board_id: str):
+        async with self.subscription_lock:
+            wanted = board_id in self.active_connections
+            if wanted and board_id not in self.subscribed_boards:
+                await self.backend.subscribe(board_id)
+                self.subscribed_boards.add(board_id)
+            elif not wanted and board_id in self.subscribed_boards:
+                await self.backend.unsubscribe(board_id)
+                self.subscribed_boards.discard(board_id)
+    async def _run_writer(self, connection: Connection):
+        try:
+            await connection.write_forever()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.evict(connection)
+    async def _close(self, websocket: WebSocket, code: int, reason: Optional[str] = None):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
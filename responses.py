@@ -0,0 +1,29 @@
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+try:
+    import orjson
+except ImportError:
+    orjson = None
+JSON_MEDIA_TYPE = "application/json"
+@lru_cache(maxsize=None)
+def get_adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+def render(model, data) -> bytes:
+    adapter = get_adapter(model)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+def render_response(model, data, headers: Optional[dict] = None, status_code: int = 200) -> Response:
+    return Response(content=render(model, data), status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+def encode_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":"), default=_json_default).encode()
+def json_response(data, headers: Optional[dict] = None, status_code: int = 200) -> Response:
+    return Response(content=encode_json(data), status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
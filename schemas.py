@@ -1,8 +1,9 @@
-from typing import Optional, Any
-from pydantic import BaseModel, ConfigDict
+from typing import Optional, Any, Literal, Union, Annotated
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 class TokenRefresh(BaseModel):
     refresh_token: str
@@ -36,6 +37,7 @@ class BoardBase(BaseModel):
     created_at: datetime
     updated_at: datetime
     owner_id: int
+    version: int = 0
     model_config = ConfigDict(from_attributes=True)
 class BoardCreate(BaseModel):
     name: str
@@ -52,7 +54,7 @@ class BoardResponse(BoardBase):
 class ListBase(BaseModel):
     id: int
     name: str
-    position: int
+    position: str
     board_id: int
     created_at: datetime
     updated_at: datetime
@@ -72,7 +74,7 @@ class CardBase(BaseModel):
     id: int
     title: str
     description: Optional[str] = None
-    position: int
+    position: str
     list_id: int
     created_at: datetime
     updated_at: datetime
@@ -136,7 +138,86 @@ class CardMove(BaseModel):
     new_list_id: int
     new_position: int
     model_config = ConfigDict(from_attributes=True)
+class ReorderItem(BaseModel):
+    id: int
+    position: int
+    model_config = ConfigDict(from_attributes=True)
 class BoardMemberAdd(BaseModel):
     user_id: int
     board_id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    is_admin: bool = False
+    model_config = ConfigDict(from_attributes=True)
+class BoardChangeEntry(BaseModel):
+    entity: str
+    id: int
+    op: str
+    data: Optional[dict[str, Any]] = None
+class BoardChangesResponse(BaseModel):
+    board_id: int
+    since: int
+    version: int
+    full: bool = False
+    changes: list[BoardChangeEntry] = []
+    snapshot: Optional["BoardResponse"] = None
+class MoveCardOperation(CardMove):
+    op: Literal["move_card"]
+class UpdateCardOperation(CardUpdate):
+    op: Literal["update_card"]
+    card_id: int
+class AddLabelOperation(LabelCreate):
+    op: Literal["add_label"]
+    card_id: int
+class RemoveLabelOperation(BaseModel):
+    op: Literal["remove_label"]
+    card_id: int
+    label_id: int
+    model_config = ConfigDict(from_attributes=True)
+class CreateCommentOperation(CommentCreate):
+    op: Literal["create_comment"]
+BatchOperation = Annotated[
+    Union[MoveCardOperation, UpdateCardOperation, AddLabelOperation, RemoveLabelOperation, CreateCommentOperation],
+    Field(discriminator="op"),
+]
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1)
+    model_config = ConfigDict(from_attributes=True)
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    data: Optional[dict[str, Any]] = None
+class BatchResponse(BaseModel):
+    board_id: int
+    version: int
+    results: list[BatchOperationResult] = []
+class PresenceMessage(BaseModel):
+    type: Literal["presence"]
+    status: Literal["active", "idle", "away"]
+    model_config = ConfigDict(extra="forbid")
+class CursorMessage(BaseModel):
+    type: Literal["cursor"]
+    x: float
+    y: float
+    model_config = ConfigDict(extra="forbid")
+class DragPreviewMessage(BaseModel):
+    type: Literal["drag_preview"]
+    card_id: int
+    list_id: int
+    index: int = Field(ge=0)
+    model_config = ConfigDict(extra="forbid")
+class TypingMessage(BaseModel):
+    type: Literal["typing"]
+    card_id: int
+    typing: bool = True
+    model_config = ConfigDict(extra="forbid")
+class PongMessage(BaseModel):
+    type: Literal["pong"]
+    model_config = ConfigDict(extra="forbid")
+ClientMessage = Annotated[
+    Union[PresenceMessage, CursorMessage, DragPreviewMessage, TypingMessage, PongMessage],
+    Field(discriminator="type"),
+]
+class PresenceEntry(BaseModel):
+    user_id: int
+    status: str
+    connections: int
+    updated_at: datetime
@@ -0,0 +1,157 @@
+import os
+from typing import Optional
+from typing import Iterable
+from sqlalchemy import select, update, insert, delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from cache import TTLCache, SizedLRUCache
+from models import User, Board, List, Card, Label, Comment, BoardMember, BoardChange, card_labels_table, card_assignees_table
+SNAPSHOT_CACHE_MAX_BYTES = int(os.getenv("SNAPSHOT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+BOARD_VERSION_CACHE_SIZE = int(os.getenv("BOARD_VERSION_CACHE_SIZE", "100000"))
+BOARD_VERSION_TTL = float(os.getenv("BOARD_VERSION_TTL", "2"))
+CHANGE_LOG_RETENTION = int(os.getenv("CHANGE_LOG_RETENTION", "1000"))
+CHANGE_LOG_COMPACT_EVERY = int(os.getenv("CHANGE_LOG_COMPACT_EVERY", "100"))
+USER_COLUMNS = (User.id, User.username, User.email, User.avatar, User.created_at, User.updated_at)
+BOARD_COLUMNS = (Board.id, Board.name, Board.description, Board.version, Board.created_at, Board.updated_at, Board.owner_id)
+LIST_COLUMNS = (List.id, List.name, List.position, List.board_id, List.created_at, List.updated_at)
+CARD_COLUMNS = (Card.id, Card.title, Card.description, Card.position, Card.list_id, Card.created_at, Card.updated_at, Card.due_date)
+LABEL_COLUMNS = (Label.id, Label.name, Label.color, Label.board_id, Label.created_at)
+COMMENT_COLUMNS = (Comment.id, Comment.content, Comment.card_id, Comment.user_id, Comment.created_at, Comment.updated_at)
+COMMENT_AUTHOR_COLUMNS = tuple(column.label(f"author_{column.key}") for column in USER_COLUMNS)
+snapshot_cache = SizedLRUCache(SNAPSHOT_CACHE_MAX_BYTES)
+board_versions = TTLCache(BOARD_VERSION_CACHE_SIZE, BOARD_VERSION_TTL)
+async def bump_board_version(db: AsyncSession, board_id: int, changes: Iterable[tuple[str, int, str]] = ()) -> int:
+    result = await db.execute(
+        update(Board).where(Board.id == board_id).values(version=Board.version + 1).returning(Board.version)
+    )
+    version = result.scalar_one()
+    rows = [
+        {"board_id": board_id, "version": version, "entity": entity, "entity_id": entity_id, "op": op}
+        for entity, entity_id, op in changes
+    ]
+    if rows:
+        await db.execute(insert(BoardChange), rows)
+    if version % CHANGE_LOG_COMPACT_EVERY == 0:
+        await db.execute(delete(BoardChange).where(
+            BoardChange.board_id == board_id,
+            BoardChange.version <= version - CHANGE_LOG_RETENTION
+        ))
+    db.info.setdefault("bumped_boards", {})[board_id] = version
+    return version
+async def get_board_version(db: AsyncSession, board_id: int) -> Optional[int]:
+    version = board_versions.get(board_id)
+    if version is None:
+        result = await db.execute(select(Board.version).where(Board.id == board_id))
+        version = result.scalar_one_or_none()
+        if version is not None and not db.info.get("replica"):
+            board_versions.set(board_id, version)
+    return version
+def forget_board(board_id: int):
+    board_versions.pop(board_id)
+    snapshot_cache.pop_where(lambda key: key[0] == board_id)
+def board_etag(board_id: int, version: int, variant: Optional[str] = None) -> str:
+    if variant is not None:
+        return f'"board-{board_id}-v{version}-{variant}"'
+    return f'"board-{board_id}-v{version}"'
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+@event.listens_for(Session, "after_commit")
+def _publish_board_versions(session):
+    for board_id, version in session.info.pop("bumped_boards", {}).items():
+        board_versions.set(board_id, version)
+@event.listens_for(Session, "after_rollback")
+def _discard_board_versions(session):
+    session.info.pop("bumped_boards", None)
+def user_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "username": row.username,
+        "email": row.email,
+        "avatar": row.avatar,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "boards": [],
+    }
+def label_dict(row) -> dict:
+    return {"id": row.id, "name": row.name, "color": row.color, "board_id": row.board_id, "created_at": row.created_at}
+def comment_dict(row) -> dict:
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "card_id": row["card_id"],
+        "author_id": row["user_id"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "author": {
+            "id": row["author_id"],
+            "username": row["author_username"],
+            "email": row["author_email"],
+            "avatar": row["author_avatar"],
+            "created_at": row["author_created_at"],
+            "updated_at": row["author_updated_at"],
+            "boards": [],
+        },
+    }
+async def load_board_snapshot(db: AsyncSession, board_id: int) -> Optional[dict]:
+    result = await db.execute(select(*BOARD_COLUMNS).where(Board.id == board_id))
+    board_row = result.mappings().first()
+    if board_row is None:
+        return None
+    board = dict(board_row)
+    result = await db.execute(select(*LIST_COLUMNS).where(List.board_id == board_id).order_by(List.position, List.id))
+    lists = [dict(row, cards=[]) for row in result.mappings()]
+    lists_by_id = {list_item["id"]: list_item for list_item in lists}
+    result = await db.execute(select(*CARD_COLUMNS).where(Card.board_id == board_id).order_by(Card.position, Card.id))
+    cards_by_id = {}
+    for row in result.mappings():
+        card = dict(row, labels=[], comments=[], assignees=[])
+        cards_by_id[card["id"]] = card
+        parent = lists_by_id.get(card["list_id"])
+        if parent is not None:
+            parent["cards"].append(card)
+    if cards_by_id:
+        result = await db.execute(
+            select(card_labels_table.c.card_id, *LABEL_COLUMNS)
+            .join(Label, Label.id == card_labels_table.c.label_id)
+            .where(Label.board_id == board_id)
+            .order_by(Label.id)
+        )
+        for row in result.all():
+            card = cards_by_id.get(row.card_id)
+            if card is not None:
+                card["labels"].append(label_dict(row))
+        result = await db.execute(
+            select(*COMMENT_COLUMNS, *COMMENT_AUTHOR_COLUMNS)
+            .join(Card, Card.id == Comment.card_id)
+            .join(User, User.id == Comment.user_id)
+            .where(Card.board_id == board_id)
+            .order_by(Comment.created_at.desc(), Comment.id.desc())
+        )
+        for row in result.mappings():
+            card = cards_by_id.get(row["card_id"])
+            if card is None:
+                continue
+            card["comments"].append(comment_dict(row))
+        result = await db.execute(
+            select(card_assignees_table.c.card_id, *USER_COLUMNS)
+            .join(User, User.id == card_assignees_table.c.user_id)
+            .join(Card, Card.id == card_assignees_table.c.card_id)
+            .where(Card.board_id == board_id)
+            .order_by(User.id)
+        )
+        for row in result.all():
+            card = cards_by_id.get(row.card_id)
+            if card is not None:
+                card["assignees"].append(user_dict(row))
+    result = await db.execute(
+        select(*USER_COLUMNS)
+        .join(BoardMember, BoardMember.user_id == User.id)
+        .where(BoardMember.board_id == board_id)
+        .order_by(User.id)
+    )
+    board["lists"] = lists
+    board["members"] = [user_dict(row) for row in result.all()]
+    return board
@@ -1,5 +1,68 @@
 const API_URL = 'http://localhost:3000/api';
 const WS_URL = 'ws://localhost:3000/ws';
+const WS_SUBPROTOCOLS = ['kanban.msgpack', 'kanban.json'];
+
+function decodeMsgpack(bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const text = new TextDecoder();
+  let offset = 0;
+
+  const str = length => {
+    const value = text.decode(bytes.subarray(offset, offset + length));
+    offset += length;
+    return value;
+  };
+  const array = length => {
+    const value = [];
+    for (let i = 0; i < length; i++) value.push(read());
+    return value;
+  };
+  const map = length => {
+    const value = {};
+    for (let i = 0; i < length; i++) {
+      const key = read();
+      value[key] = read();
+    }
+    return value;
+  };
+  const next = (size, getter) => {
+    const value = getter.call(view, offset);
+    offset += size;
+    return value;
+  };
+  const read = () => {
+    const type = bytes[offset++];
+    if (type <= 0x7f) return type;
+    if (type <= 0x8f) return map(type & 0x0f);
+    if (type <= 0x9f) return array(type & 0x0f);
+    if (type <= 0xbf) return str(type & 0x1f);
+    if (type >= 0xe0) return type - 0x100;
+    switch (type) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xca: return next(4, view.getFloat32);
+      case 0xcb: return next(8, view.getFloat64);
+      case 0xcc: return next(1, view.getUint8);
+      case 0xcd: return next(2, view.getUint16);
+      case 0xce: return next(4, view.getUint32);
+      case 0xcf: return Number(next(8, view.getBigUint64));
+      case 0xd0: return next(1, view.getInt8);
+      case 0xd1: return next(2, view.getInt16);
+      case 0xd2: return next(4, view.getInt32);
+      case 0xd3: return Number(next(8, view.getBigInt64));
+      case 0xd9: return str(next(1, view.getUint8));
+      case 0xda: return str(next(2, view.getUint16));
+      case 0xdb: return str(next(4, view.getUint32));
+      case 0xdc: return array(next(2, view.getUint16));
+      case 0xdd: return array(next(4, view.getUint32));
+      case 0xde: return map(next(2, view.getUint16));
+      case 0xdf: return map(next(4, view.getUint32));
+      default: throw new Error(`Unsupported msgpack type 0x${type.toString(16)}`);
+    }
+  };
+  return read();
+}
 
 class KanbanApp {
   constructor() {
@@ -8,6 +71,7 @@ class KanbanApp {
     this.refreshToken = localStorage.getItem('refreshToken');
     this.boards = [];
     this.currentBoard = null;
+    this.boardVersion = null;
     this.draggedCard = null;
     this.initEventListeners();
     this.connectWebSocket();
@@ -63,16 +127,12 @@ class KanbanApp {
       const response = await fetch(`${API_URL}/auth/refresh`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ token: this.refreshToken })
+        body: JSON.stringify({ refresh_token: this.refreshToken })
       });
 
       if (!response.ok) throw new Error('Refresh failed');
 
-      const { token, refreshToken } = await response.json();
-      this.token = token;
-      this.refreshToken = refreshToken;
-      localStorage.setItem('token', token);
-      localStorage.setItem('refreshToken', refreshToken);
+      this.storeTokens(await response.json());
       return true;
     } catch {
       this.logout();
@@ -80,6 +140,13 @@ class KanbanApp {
     }
   }
 
+  storeTokens({ access_token, refresh_token }) {
+    this.token = access_token;
+    this.refreshToken = refresh_token;
+    localStorage.setItem('token', access_token);
+    localStorage.setItem('refreshToken', refresh_token);
+  }
+
   handleApiError(error) {
     const notification = document.getElementById('notification');
     notification.textContent = error.message || 'An error occurred';
@@ -90,19 +157,31 @@ class KanbanApp {
   connectWebSocket() {
     if (!this.token) return;
 
-    this.ws = new WebSocket(`${WS_URL}?token=${this.token}`);
+    this.ws = new WebSocket(`${WS_URL}?token=${this.token}`, WS_SUBPROTOCOLS);
+    this.ws.binaryType = 'arraybuffer';
 
     this.ws.onopen = () => {
       console.log('WebSocket connected');
+      this.syncBoard();
     };
 
     this.ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      const data = typeof event.data === 'string'
+        ? JSON.parse(event.data)
+        : decodeMsgpack(new Uint8Array(event.data));
       this.handleWebSocketMessage(data);
     };
 
-    this.ws.onclose = () => {
-      setTimeout(() => this.connectWebSocket(), 5000);
+    this.ws.onclose = (event) => {
+      if (event.code === 1008 && event.reason === 'Access revoked') {
+        this.currentBoard = null;
+        this.boardVersion = null;
+        window.location.href = '/boards';
+      } else if (event.code === 1008) {
+        this.refreshAccessToken().then(refreshed => refreshed && this.connectWebSocket());
+      } else {
+        setTimeout(() => this.connectWebSocket(), 5000);
+      }
     };
 
     this.ws.onerror = (error) => {
@@ -111,12 +190,84 @@ class KanbanApp {
   }
 
   handleWebSocketMessage(data) {
-    if (data.type === 'cardUpdate') {
-      this.updateCardInDOM(data.payload);
-    } else if (data.type === 'cardCreate') {
-      this.addCardToDOM(data.payload);
-    } else if (data.type === 'cardDelete') {
-      this.removeCardFromDOM(data.payload.cardId);
+    if (data.type === 'ping') {
+      this.ws.send(JSON.stringify({ type: 'pong' }));
+      return;
+    }
+    const events = Array.isArray(data) ? data : [data];
+    if (events.some(event => event.type === 'resync')) {
+      this.syncBoard();
+      return;
+    }
+    const known = this.boardVersion;
+    if (known !== null) {
+      const version = this.coveredVersion(events, known);
+      if (version === null) {
+        this.syncBoard();
+        return;
+      }
+      this.boardVersion = version;
+    }
+    events
+      .filter(event => known === null || event.version === undefined || event.version > known)
+      .forEach(event => this.applyEvent(event));
+  }
+
+  coveredVersion(events, version) {
+    const ranges = events
+      .filter(event => event.version !== undefined)
+      .map(event => [event.base_version ?? event.version - 1, event.version])
+      .sort((a, b) => a[0] - b[0]);
+    for (const [base, next] of ranges) {
+      if (next <= version) continue;
+      if (base > version) return null;
+      version = next;
+    }
+    return version;
+  }
+
+  applyEvent(event) {
+    switch (event.type) {
+      case 'batch':
+        event.events.forEach(child => this.applyEvent(child));
+        break;
+      case 'card_created':
+        this.addCardToDOM(event.card);
+        break;
+      case 'card_updated':
+        this.updateCardInDOM(event.card);
+        break;
+      case 'card_moved':
+        this.removeCardFromDOM(event.card_id);
+        this.addCardToDOM(event.card);
+        break;
+      case 'card_deleted':
+        this.removeCardFromDOM(event.card_id);
+        break;
+      case 'presence':
+      case 'cursor':
+      case 'drag_preview':
+      case 'typing':
+        break;
+      case 'error':
+        console.warn('WebSocket error:', event.detail);
+        break;
+      case 'comment_created':
+      case 'comment_updated':
+      case 'comment_deleted':
+      case 'label_added_to_card':
+      case 'label_removed_from_card':
+      case 'member_added':
+      case 'member_updated':
+      case 'member_removed':
+        break;
+      case 'board_deleted':
+        this.currentBoard = null;
+        this.boardVersion = null;
+        window.location.href = '/boards';
+        break;
+      default:
+        this.selectBoard(this.currentBoard);
     }
   }
 
@@ -146,10 +297,7 @@ class KanbanApp {
         body: JSON.stringify({ email, password })
       });
 
-      this.token = data.token;
-      this.refreshToken = data.refreshToken;
-      localStorage.setItem('token', data.token);
-      localStorage.setItem('refreshToken', data.refreshToken);
+      this.storeTokens(data);
 
       window.location.href = '/boards';
     } catch (error) {
@@ -192,12 +340,42 @@ class KanbanApp {
     this.currentBoard = boardId;
     try {
       const data = await this.apiCall(`/boards/${boardId}`);
+      this.boardVersion = data.version;
       this.renderBoard(data);
     } catch (error) {
       this.handleApiError(error);
     }
   }
 
+  async syncBoard() {
+    if (!this.currentBoard || this.boardVersion === null) return;
+    try {
+      const delta = await this.apiCall(`/boards/${this.currentBoard}/changes?since=${this.boardVersion}`);
+      if (delta.full) {
+        this.renderBoard(delta.snapshot);
+      } else {
+        delta.changes.forEach(change => this.applyChange(change));
+      }
+      this.boardVersion = delta.version;
+    } catch (error) {
+      this.handleApiError(error);
+    }
+  }
+
+  applyChange(change) {
+    if (change.entity !== 'card') {
+      this.selectBoard(this.currentBoard);
+      return;
+    }
+    if (change.op === 'delete') {
+      this.removeCardFromDOM(change.id);
+    } else if (document.querySelector(`[data-card-id="${change.id}"]`)) {
+      this.updateCardInDOM(change.data);
+    } else {
+      this.addCardToDOM(change.data);
+    }
+  }
+
   renderBoard(board) {
     const container = document.getElementById('boardContainer');
     if (!container) return;
@@ -228,7 +406,8 @@ class KanbanApp {
       <div class="card" 
            draggable="true" 
            data-card-id="${card.id}"
-           data-column-id="${card.columnId}">
+           data-column-id="${card.list_id ?? card.columnId}"
+           data-position="${card.position}">
         <h3>${card.title}</h3>
         <p>${card.description || ''}</p>
         <div class="card-meta">
@@ -349,9 +528,14 @@ class KanbanApp {
   }
 
   addCardToDOM(card) {
-    const container = document.querySelector(`[data-column-id="${card.columnId}"] .cards-container`);
+    const container = document.querySelector(`.cards-container[data-column-id="${card.list_id ?? card.columnId}"]`);
     if (container) {
-      container.insertAdjacentHTML('beforeend', this.renderCard(card));
+      const next = [...container.querySelectorAll('.card')].find(el => el.dataset.position > card.position);
+      if (next) {
+        next.insertAdjacentHTML('beforebegin', this.renderCard(card));
+      } else {
+        container.insertAdjacentHTML('beforeend', this.renderCard(card));
+      }
       this.attachDragListeners();
     }
   }
@@ -0,0 +1,114 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from snapshot import etag_matches
+STATIC_ROOT = os.getenv("STATIC_ROOT", "dist")
+STATIC_MEMORY_MAX_BYTES = int(os.getenv("STATIC_MEMORY_MAX_BYTES", str(256 * 1024)))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+HASHED_ASSET = re.compile(r"^assets/.*[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+INDEX_FILE = "index.html"
+class StaticFile:
+    def __init__(self, path: str, stat_result: os.stat_result, etag_suffix: str = ""):
+        self.path = path
+        self.stat = stat_result
+        self.etag = f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}{etag_suffix}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.body: Optional[bytes] = None
+        if stat_result.st_size <= STATIC_MEMORY_MAX_BYTES:
+            with open(path, "rb") as handle:
+                self.body = handle.read()
+class StaticAsset:
+    def __init__(self, name: str, original: StaticFile):
+        self.original = original
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_ASSET.match(name) else REVALIDATE_CACHE_CONTROL
+        self.variants: dict[str, StaticFile] = {}
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+class StaticAssets:
+    def __init__(self, root: str = STATIC_ROOT):
+        self.root = root
+        self.assets: dict[str, StaticAsset] = {}
+    def scan(self):
+        assets = {}
+        compressed = []
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if name.endswith(tuple(suffix for _, suffix in PRECOMPRESSED_ENCODINGS)):
+                    compressed.append((name, path))
+                    continue
+                assets[name] = StaticAsset(name, StaticFile(path, os.stat(path)))
+        for name, path in compressed:
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                if name.endswith(suffix) and name[:-len(suffix)] in assets:
+                    assets[name[:-len(suffix)]].variants[encoding] = StaticFile(path, os.stat(path), f"-{encoding}")
+                    break
+            else:
+                assets[name] = StaticAsset(name, StaticFile(path, os.stat(path)))
+        self.assets = assets
+    def lookup(self, path: str, request: Request) -> StaticAsset:
+        asset = self.assets.get(path.strip("/") or INDEX_FILE)
+        if asset is not None:
+            return asset
+        if "." not in path.rsplit("/", 1)[-1] and "text/html" in request.headers.get("accept", ""):
+            asset = self.assets.get(INDEX_FILE)
+            if asset is not None:
+                return asset
+        raise HTTPException(status_code=404, detail="Not Found")
+    def respond(self, path: str, request: Request) -> Response:
+        asset = self.lookup(path, request)
+        encoding = None
+        selected = asset.original
+        if asset.variants:
+            accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+            for candidate, _ in PRECOMPRESSED_ENCODINGS:
+                if candidate in accepted and candidate in asset.variants:
+                    encoding, selected = candidate, asset.variants[candidate]
+                    break
+        headers = {"ETag": selected.etag, "Last-Modified": selected.last_modified, "Cache-Control": asset.cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        if self._not_modified(request, selected):
+            return Response(status_code=304, headers=headers)
+        if selected.body is not None:
+            return Response(content=selected.body, media_type=asset.content_type, headers=headers)
+        response = FileResponse(selected.path, stat_result=selected.stat, media_type=asset.content_type, headers=headers)
+        response.headers["ETag"] = selected.etag
+        response.headers["Last-Modified"] = selected.last_modified
+        return response
+    @staticmethod
+    def _not_modified(request: Request, selected: StaticFile) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, selected.etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(selected.stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+static_assets = StaticAssets()
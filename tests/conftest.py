@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import uuid
+TEST_DIR = tempfile.mkdtemp(prefix="kanban-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("STATIC_ROOT", os.path.join(TEST_DIR, "dist"))
+def database_path() -> str:
+    return os.environ["DATABASE_URL"].split(":///", 1)[1]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytest
+from fastapi.testclient import TestClient
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as client:
+        yield client
+@pytest.fixture
+def register(client):
+    def register() -> tuple[int, dict]:
+        name = uuid.uuid4().hex[:12]
+        response = client.post("/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "secret"})
+        assert response.status_code == 200, response.text
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return client.get("/users/me", headers=headers).json()["id"], headers
+    return register
+@pytest.fixture
+def headers(register):
+    return register()[1]
+@pytest.fixture
+def board(client, headers):
+    response = client.post("/boards", json={"name": "Board"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+@pytest.fixture
+def board_list(client, headers, board):
+    response = client.post(f"/boards/{board['id']}/lists", json={"name": "Todo", "board_id": board["id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
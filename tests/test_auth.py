@@ -0,0 +1,18 @@
+import uuid
+def test_refresh_token_round_trip(client):
+    name = uuid.uuid4().hex[:12]
+    response = client.post("/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "secret"})
+    assert response.status_code == 200, response.text
+    refresh_token = response.json()["refresh_token"]
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200, response.text
+    tokens = response.json()
+    assert tokens["refresh_token"] and tokens["access_token"]
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.json()["username"] == name
+def test_login_rejects_unknown_users_and_wrong_passwords(client, register):
+    user_id, headers = register()
+    username = client.get("/users/me", headers=headers).json()["username"]
+    assert client.post("/auth/login", data={"username": username, "password": "secret"}).status_code == 200
+    assert client.post("/auth/login", data={"username": username, "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", data={"username": uuid.uuid4().hex, "password": "secret"}).status_code == 401
@@ -0,0 +1,16 @@
+def test_batch_results_reflect_each_operation_as_applied(client, headers, board, board_list):
+    other = client.post(f"/boards/{board['id']}/lists", json={"name": "Done", "board_id": board["id"]}, headers=headers).json()
+    card = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Before", "list_id": board_list["id"]}, headers=headers).json()
+    response = client.post(f"/boards/{board['id']}/batch", json={"operations": [
+        {"op": "move_card", "card_id": card["id"], "new_list_id": other["id"], "new_position": 0},
+        {"op": "update_card", "card_id": card["id"], "title": "After"},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    first, second = response.json()["results"]
+    assert (first["data"]["list_id"], first["data"]["title"]) == (other["id"], "Before")
+    assert (second["data"]["list_id"], second["data"]["title"]) == (other["id"], "After")
+def test_empty_batch_is_rejected_without_bumping_the_board(client, headers, board):
+    version = client.get(f"/boards/{board['id']}", headers=headers).json()["version"]
+    response = client.post(f"/boards/{board['id']}/batch", json={"operations": []}, headers=headers)
+    assert response.status_code == 422
+    assert client.get(f"/boards/{board['id']}", headers=headers).json()["version"] == version
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from database import engine
+@contextmanager
+def count_queries():
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+def populate(client, headers, card_count: int) -> int:
+    board = client.post("/boards", json={"name": f"{card_count} cards"}, headers=headers).json()
+    for list_index in range(2):
+        board_list = client.post(f"/boards/{board['id']}/lists", json={"name": f"List {list_index}", "board_id": board["id"]}, headers=headers).json()
+        for card_index in range(card_count):
+            card = client.post(f"/lists/{board_list['id']}/cards", json={"title": f"Card {card_index}", "list_id": board_list["id"]}, headers=headers).json()
+            client.post(f"/cards/{card['id']}/labels", json={"name": "bug", "color": "#ff0000", "board_id": board["id"]}, headers=headers)
+            client.post(f"/cards/{card['id']}/comments", json={"content": "First", "card_id": card["id"]}, headers=headers)
+            client.post(f"/cards/{card['id']}/comments", json={"content": "Second", "card_id": card["id"]}, headers=headers)
+    return board["id"]
+def test_board_snapshot_query_count_is_independent_of_card_count(client, headers):
+    counts = []
+    for card_count in (1, 15):
+        board_id = populate(client, headers, card_count)
+        with count_queries() as statements:
+            response = client.get(f"/boards/{board_id}", headers=headers)
+        assert response.status_code == 200, response.text
+        cards = [card for board_list in response.json()["lists"] for card in board_list["cards"]]
+        assert len(cards) == 2 * card_count
+        assert all(len(card["comments"]) == 2 and len(card["labels"]) == 1 for card in cards)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+    assert counts[1] <= 10
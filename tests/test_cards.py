@@ -0,0 +1,27 @@
+def test_create_card_and_read_it_back(client, headers, board, board_list):
+    response = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Write tests", "list_id": board_list["id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    card = response.json()
+    assert card["title"] == "Write tests"
+    assert card["labels"] == [] and card["comments"] == [] and card["assignees"] == []
+    response = client.get(f"/cards/{card['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == card["id"]
+    response = client.get(f"/lists/{board_list['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()["cards"]] == [card["id"]]
+    response = client.get(f"/lists/{board_list['id']}/cards", headers=headers)
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()] == [card["id"]]
+    response = client.get("/boards", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["lists"][0]["cards"][0]["id"] == card["id"]
+    response = client.get(f"/boards/{board['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["lists"][0]["cards"][0]["title"] == "Write tests"
+def test_empty_card_reorder_is_rejected_without_bumping_the_board(client, headers, board, board_list):
+    version = client.get(f"/boards/{board['id']}", headers=headers).json()["version"]
+    response = client.post(f"/lists/{board_list['id']}/cards/reorder", json=[], headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No cards to reorder"
+    assert client.get(f"/boards/{board['id']}", headers=headers).json()["version"] == version
@@ -0,0 +1,21 @@
+def test_board_etag_stays_strong_and_revalidates_when_compressed(client, headers, board, board_list):
+    for index in range(20):
+        client.post(f"/lists/{board_list['id']}/cards", json={"title": f"Card {index}", "description": "x" * 40, "list_id": board_list["id"]}, headers=headers)
+    gzip_headers = {**headers, "Accept-Encoding": "gzip"}
+    response = client.get(f"/boards/{board['id']}", headers=gzip_headers)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    etag = response.headers["etag"]
+    assert etag.endswith('-gzip"') and not etag.startswith("W/")
+    assert response.json()["id"] == board["id"]
+    response = client.get(f"/boards/{board['id']}", headers={**gzip_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    response = client.get(f"/boards/{board['id']}", headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == etag.replace('-gzip"', '"')
+def test_small_responses_are_not_compressed(client, headers):
+    response = client.get("/users/me", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
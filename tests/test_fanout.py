@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import realtime
+from pubsub import InMemoryBackend
+from realtime import ConnectionManager
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False, broken: bool = False):
+        self.scope = {"subprotocols": []}
+        self.stalled = stalled
+        self.broken = broken
+        self.frames: list[str] = []
+        self.closed = None
+    async def accept(self, subprotocol=None):
+        pass
+    async def send_text(self, frame: str):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.frames.append(frame)
+    async def close(self, code: int, reason=None):
+        self.closed = code
+async def open_board(manager: ConnectionManager, sockets: list[FakeWebSocket], board_id: str = "1"):
+    await manager.start()
+    return [await manager.connect(websocket, board_id) for websocket in sockets]
+async def publish(manager: ConnectionManager, count: int, board_id: str = "1"):
+    for version in range(1, count + 1):
+        await manager.broadcast({"type": "card_created", "list_id": 1, "version": version}, board_id)
+async def wait_until(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+def test_stalled_socket_does_not_delay_the_others(monkeypatch):
+    monkeypatch.setattr(realtime, "WS_BATCH_WINDOW", 0)
+    async def scenario():
+        manager = ConnectionManager(InMemoryBackend())
+        healthy = [FakeWebSocket() for _ in range(20)]
+        stalled = FakeWebSocket(stalled=True)
+        await open_board(manager, [stalled, *healthy])
+        started = time.monotonic()
+        await publish(manager, 10)
+        await wait_until(lambda: all(len(websocket.frames) == 10 for websocket in healthy), timeout=1)
+        elapsed = time.monotonic() - started
+        await manager.stop()
+        return elapsed, healthy[0].frames, stalled
+    elapsed, frames, stalled = asyncio.run(scenario())
+    assert elapsed < 1
+    assert [json.loads(frame)["version"] for frame in frames] == list(range(1, 11))
+    assert stalled.frames == [] and stalled.closed is None
+def test_failed_or_timed_out_writers_are_evicted(monkeypatch):
+    monkeypatch.setattr(realtime, "WS_BATCH_WINDOW", 0)
+    monkeypatch.setattr(realtime, "WS_SEND_TIMEOUT", 0.05)
+    async def scenario():
+        manager = ConnectionManager(InMemoryBackend())
+        healthy, broken, stalled = FakeWebSocket(), FakeWebSocket(broken=True), FakeWebSocket(stalled=True)
+        await open_board(manager, [healthy, broken, stalled])
+        await publish(manager, 3)
+        await wait_until(lambda: broken.closed is not None and stalled.closed is not None)
+        await publish(manager, 1)
+        await wait_until(lambda: len(healthy.frames) == 4)
+        remaining = list(manager.active_connections["1"])
+        await manager.stop()
+        return manager, healthy, broken, stalled, remaining
+    manager, healthy, broken, stalled, remaining = asyncio.run(scenario())
+    assert (broken.closed, stalled.closed) == (1011, 1011)
+    assert remaining == [healthy]
+    assert manager.evicted_connections == 2
+def test_disconnect_policy_closes_a_full_queue_with_1013(monkeypatch):
+    monkeypatch.setattr(realtime, "WS_BATCH_WINDOW", 0)
+    async def scenario():
+        manager = ConnectionManager(InMemoryBackend())
+        healthy, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+        _, slow = await open_board(manager, [healthy, stalled])
+        slow.policy = "disconnect"
+        slow.max_queue = 2
+        await publish(manager, 5)
+        await wait_until(lambda: stalled.closed is not None and len(healthy.frames) == 5)
+        await manager.stop()
+        return manager, stalled
+    manager, stalled = asyncio.run(scenario())
+    assert stalled.closed == 1013
+    assert stalled not in manager.active_connections.get("1", {})
+def test_fanout_load_with_stalled_clients(monkeypatch):
+    monkeypatch.setattr(realtime, "WS_BATCH_WINDOW", 0)
+    async def scenario():
+        manager = ConnectionManager(InMemoryBackend())
+        healthy = [FakeWebSocket() for _ in range(1000)]
+        stalled = [FakeWebSocket(stalled=True) for _ in range(5)]
+        connections = await open_board(manager, [*stalled, *healthy])
+        for connection in connections[:len(stalled)]:
+            connection.max_queue = 8
+        started = time.monotonic()
+        await publish(manager, 50)
+        await wait_until(lambda: all(len(websocket.frames) == 50 for websocket in healthy), timeout=20)
+        elapsed = time.monotonic() - started
+        queues = [len(connection.pending) for connection in connections[:len(stalled)]]
+        dropped = [connection.dropped for connection in connections[:len(stalled)]]
+        await manager.stop()
+        return elapsed, queues, dropped
+    elapsed, queues, dropped = asyncio.run(scenario())
+    assert elapsed < 20
+    assert all(queue <= 8 for queue in queues)
+    assert all(count > 0 for count in dropped)
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from fieldsets import parse_fieldset
+def spec(fields=(), **expand) -> dict:
+    return {"fields": list(fields), "expand": expand}
+def test_parse_fieldset_without_parameters_is_the_full_response():
+    assert parse_fieldset("card", None, None) is None
+    assert parse_fieldset("card", "", "") is None
+def test_parse_fieldset_nests_dotted_fields_and_expands():
+    assert parse_fieldset("board", "name,lists.cards.title,lists.name", "members") == spec(
+        ["name"], members=spec(), lists=spec(["name"], cards=spec(["title"]))
+    )
+    assert parse_fieldset("card", "title, labels", "comments.author") == spec(
+        ["title"], labels=spec(), comments=spec(author=spec())
+    )
+@pytest.mark.parametrize("fields, expand, path", [
+    ("nope", None, "nope"),
+    ("title.length", None, "title.length"),
+    ("labels.nope", None, "labels.nope"),
+    (None, "title", "title"),
+    (None, "labels.name", "labels.name"),
+])
+def test_parse_fieldset_rejects_unknown_fields(fields, expand, path):
+    with pytest.raises(HTTPException) as rejected:
+        parse_fieldset("card", fields, expand)
+    assert rejected.value.status_code == 400
+    assert rejected.value.detail == f"Unknown field '{path}'"
+def test_unknown_field_returns_400(client, headers, board):
+    response = client.get(f"/boards/{board['id']}", params={"fields": "name,secret"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown field 'secret'"
+def test_nested_expand_selects_only_requested_columns(client, headers, board, board_list):
+    card = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Nested", "list_id": board_list["id"]}, headers=headers).json()
+    response = client.post(f"/cards/{card['id']}/comments", json={"content": "Hi", "card_id": card["id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    response = client.get(
+        f"/boards/{board['id']}",
+        params={"fields": "name,lists.cards.title,lists.cards.comments.content", "expand": "lists.cards.comments.author"},
+        headers=headers
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert set(body) == {"id", "name", "lists"}
+    [board_list_body] = body["lists"]
+    assert set(board_list_body) == {"id", "name", "position", "board_id", "created_at", "updated_at", "cards"}
+    [card_body] = board_list_body["cards"]
+    assert card_body["title"] == "Nested" and set(card_body) == {"id", "title", "comments"}
+    [comment] = card_body["comments"]
+    assert set(comment) == {"id", "content", "author"}
+    assert comment["author"]["id"] == board["owner_id"] and "email" in comment["author"]
+def test_sparse_pages_follow_the_cursor(client, headers, board_list):
+    ids = [
+        client.post(f"/lists/{board_list['id']}/cards", json={"title": f"Card {index}", "list_id": board_list["id"]}, headers=headers).json()["id"]
+        for index in range(5)
+    ]
+    seen = []
+    cursor = None
+    while True:
+        params = {"fields": "title,labels", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/lists/{board_list['id']}/cards", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= 2
+        assert all(set(card) == {"id", "title", "labels"} for card in page)
+        seen.extend(card["id"] for card in page)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == ids
@@ -0,0 +1,28 @@
+import json
+import os
+import metrics
+def test_gather_labels_gauges_by_worker_and_sums_counters(tmp_path, monkeypatch):
+    registry = metrics.MetricsRegistry(str(tmp_path))
+    healthy = metrics.Gauge("test_replica_healthy", "Replica health.", ("pool",))
+    served = metrics.Counter("test_requests_total", "Requests.")
+    metrics.registry.metrics.remove(healthy)
+    metrics.registry.metrics.remove(served)
+    registry.register(healthy)
+    registry.register(served)
+    healthy.set(1, "replica")
+    served.inc(amount=3)
+    other = {
+        "test_replica_healthy": {"type": "gauge", "help": "Replica health.", "samples": {'test_replica_healthy{pool="replica"}': 1}},
+        "test_requests_total": {"type": "counter", "help": "Requests.", "samples": {"test_requests_total": 4}},
+    }
+    (tmp_path / "1.json").write_text(json.dumps(other))
+    merged = registry.gather()
+    assert merged["test_replica_healthy"]["samples"] == {
+        'test_replica_healthy{pool="replica",pid="1"}': 1,
+        f'test_replica_healthy{{pool="replica",pid="{os.getpid()}"}}': 1,
+    }
+    assert merged["test_requests_total"]["samples"] == {"test_requests_total": 7}
+def test_http_metrics_use_route_template(client, headers, board):
+    client.get(f"/boards/{board['id']}", headers=headers)
+    assert metrics.http_responses.values[("GET", "/boards/{board_id}", "200")] >= 1
+    assert metrics.http_requests_in_flight.values[("GET",)] == 0
@@ -0,0 +1,51 @@
+import sqlite3
+import tracemalloc
+from datetime import datetime, timedelta
+from conftest import database_path
+COMMENT_COUNT = 20000
+PAGE_SIZE = 200
+def test_walking_comments_pages_with_bounded_memory(client, headers, board_list):
+    card = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Busy", "list_id": board_list["id"]}, headers=headers).json()
+    author_id = client.get("/users/me", headers=headers).json()["id"]
+    start = datetime(2024, 1, 1)
+    with sqlite3.connect(database_path()) as connection:
+        connection.executemany(
+            "INSERT INTO comments (content, card_id, user_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"Comment {index}", card["id"], author_id, (start + timedelta(seconds=index // 3)).isoformat(" ", "microseconds"), start.isoformat(" ", "microseconds"))
+                for index in range(COMMENT_COUNT)
+            )
+        )
+    seen = 0
+    last_key = None
+    cursor = None
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        while True:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+            response = client.get(f"/cards/{card['id']}/comments", params=params, headers=headers)
+            assert response.status_code == 200, response.text
+            cursor = response.headers.get("x-next-cursor")
+            page = response.json()
+            assert len(page) <= PAGE_SIZE
+            for comment in page:
+                key = (comment["created_at"], comment["id"])
+                assert last_key is None or key < last_key
+                last_key = key
+            seen += len(page)
+            del page, response
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current)
+            if cursor is None:
+                break
+    finally:
+        tracemalloc.stop()
+    assert seen == COMMENT_COUNT
+    quarter = len(peaks) // 4
+    assert max(peaks[-quarter:]) < 2 * max(peaks[1:quarter + 1])
+    assert retained[-1] - retained[0] < 1024 * 1024
@@ -0,0 +1,42 @@
+import asyncio
+import json
+from permissions import apply_permission_invalidation, permission_cache
+from pubsub import InMemoryBackend, InMemoryBroker
+from realtime import INVALIDATION_CHANNEL, ConnectionManager
+def test_cached_role_survives_card_edits_but_not_member_removal(client, register, headers, board, board_list):
+    member_id, member_headers = register()
+    response = client.post(f"/boards/{board['id']}/members", json={"user_id": member_id, "board_id": board["id"]}, headers=headers)
+    assert response.status_code == 204, response.text
+    assert client.get(f"/boards/{board['id']}/presence", headers=member_headers).status_code == 200
+    assert permission_cache.get((board["id"], member_id)) == "member"
+    response = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Edit", "list_id": board_list["id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.put(f"/cards/{response.json()['id']}", json={"title": "Edited"}, headers=member_headers).status_code == 200
+    assert permission_cache.get((board["id"], member_id)) == "member"
+    response = client.delete(f"/boards/{board['id']}/members/{member_id}", headers=headers)
+    assert response.status_code == 204, response.text
+    assert permission_cache.get((board["id"], member_id), "missing") == "missing"
+    assert client.get(f"/boards/{board['id']}/presence", headers=member_headers).status_code == 403
+def test_invalidations_reach_every_worker():
+    async def scenario():
+        broker = InMemoryBroker()
+        workers = [ConnectionManager(InMemoryBackend(broker)) for _ in range(2)]
+        received = [[] for _ in workers]
+        for worker, messages in zip(workers, received):
+            worker.add_invalidation_listener(messages.append)
+            await worker.start()
+        await workers[0].invalidate({"type": "permissions", "board_id": 1, "user_id": 2})
+        for worker in workers:
+            await worker.stop()
+        return received
+    assert asyncio.run(scenario()) == [[{"type": "permissions", "board_id": 1, "user_id": 2}]] * 2
+def test_invalidation_messages_drop_cached_roles():
+    permission_cache.set((9001, 1), "member")
+    permission_cache.set((9001, 2), "admin")
+    permission_cache.set((9002, 1), "owner")
+    apply_permission_invalidation({"type": "permissions", "board_id": 9001, "user_id": 1})
+    assert [permission_cache.get(key) for key in ((9001, 1), (9001, 2), (9002, 1))] == [None, "admin", "owner"]
+    apply_permission_invalidation({"type": "permissions", "board_id": 9001, "user_id": None})
+    assert [permission_cache.get(key) for key in ((9001, 2), (9002, 1))] == [None, "owner"]
+    apply_permission_invalidation(json.loads(json.dumps({"type": "resync", "board_id": INVALIDATION_CHANNEL})))
+    assert permission_cache.get((9002, 1)) is None
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import timedelta
+import pytest
+from starlette.websockets import WebSocketDisconnect
+import realtime
+from middleware.auth import create_access_token
+def board_socket(client, token: str, board):
+    return client.websocket_connect(f"/ws/boards/{board['id']}?token={token}")
+def bearer(headers) -> str:
+    return headers["Authorization"].split()[1]
+def events_of(message) -> list[dict]:
+    return message if isinstance(message, list) else [message]
+def presence(client, headers, board) -> dict[int, str]:
+    response = client.get(f"/boards/{board['id']}/presence", headers=headers)
+    assert response.status_code == 200, response.text
+    return {entry["user_id"]: entry["status"] for entry in response.json()}
+def wait_for_presence(client, headers, board, expected: dict[int, str]):
+    deadline = time.monotonic() + 2
+    while presence(client, headers, board) != expected:
+        assert time.monotonic() < deadline, presence(client, headers, board)
+        time.sleep(0.02)
+def receive_until_closed(websocket, pong: bool = False) -> int:
+    try:
+        while True:
+            for event in events_of(websocket.receive_json()):
+                if pong and event["type"] == "ping":
+                    websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect as exc:
+        return exc.code
+@pytest.fixture
+def fast_heartbeat(client, monkeypatch):
+    import main
+    async def restart():
+        if main.manager.heartbeat is not None:
+            main.manager.heartbeat.cancel()
+        main.manager.heartbeat = asyncio.create_task(main.manager._heartbeat())
+    monkeypatch.setattr(realtime, "WS_PING_INTERVAL", 0.05)
+    monkeypatch.setattr(realtime, "WS_IDLE_TIMEOUT", 0.3)
+    client.portal.call(restart)
+    yield
+    monkeypatch.undo()
+    client.portal.call(restart)
+def test_presence_tracks_sockets_and_status(client, register, headers, board):
+    member_id, member_headers = register()
+    response = client.post(f"/boards/{board['id']}/members", json={"user_id": member_id, "board_id": board["id"]}, headers=headers)
+    assert response.status_code == 204, response.text
+    owner_id = board["owner_id"]
+    with board_socket(client, bearer(headers), board) as watcher:
+        wait_for_presence(client, headers, board, {owner_id: "active"})
+        with board_socket(client, bearer(member_headers), board) as member:
+            wait_for_presence(client, headers, board, {owner_id: "active", member_id: "active"})
+            member.send_json({"type": "presence", "status": "away"})
+            wait_for_presence(client, headers, board, {owner_id: "active", member_id: "away"})
+        wait_for_presence(client, headers, board, {owner_id: "active"})
+        seen = []
+        while ("offline", member_id) not in seen:
+            seen.extend((event.get("status"), event.get("user_id")) for event in events_of(watcher.receive_json()) if event["type"] == "presence")
+    assert seen.index(("active", member_id)) < seen.index(("away", member_id)) < seen.index(("offline", member_id))
+    wait_for_presence(client, headers, board, {})
+def test_idle_sockets_are_evicted_with_1001(client, headers, board, fast_heartbeat):
+    with board_socket(client, bearer(headers), board) as idle:
+        assert receive_until_closed(idle) == 1001
+    wait_for_presence(client, headers, board, {})
+def test_sockets_answering_pings_stay_open(client, headers, board, fast_heartbeat):
+    with board_socket(client, bearer(headers), board) as websocket:
+        deadline = time.monotonic() + 0.6
+        while time.monotonic() < deadline:
+            for event in events_of(websocket.receive_json()):
+                if event["type"] == "ping":
+                    websocket.send_json({"type": "pong"})
+        assert presence(client, headers, board) == {board["owner_id"]: "active"}
+def test_sockets_outliving_their_token_are_closed_with_1008(client, headers, board, fast_heartbeat):
+    token = create_access_token({"sub": str(board["owner_id"])}, expires_delta=timedelta(seconds=1))
+    with board_socket(client, token, board) as websocket:
+        assert receive_until_closed(websocket, pong=True) == 1008
+    wait_for_presence(client, headers, board, {})
@@ -0,0 +1,8 @@
+from middleware import profiling
+def test_server_timing_reports_queries_in_debug(client, headers, board, monkeypatch):
+    monkeypatch.setattr(profiling, "DEBUG", True)
+    response = client.get(f"/boards/{board['id']}", headers=headers)
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert int(timing.split('desc="')[1].split()[0]) > 0
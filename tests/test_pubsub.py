@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+import pubsub
+from pubsub import BroadcastBackend, PostgresBackend
+class FakeListener:
+    def __init__(self):
+        self.channels = {}
+        self.termination_listeners = []
+        self.closed = False
+    def is_closed(self):
+        return self.closed
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+    def remove_termination_listener(self, callback):
+        self.termination_listeners.remove(callback)
+    async def add_listener(self, channel, callback):
+        self.channels[channel] = callback
+    async def remove_listener(self, channel, callback):
+        self.channels.pop(channel, None)
+    async def close(self):
+        self.closed = True
+    def drop(self):
+        self.closed = True
+        for callback in list(self.termination_listeners):
+            callback(self)
+class FakePool:
+    async def close(self):
+        pass
+class FakeAsyncpg:
+    InterfaceError = type("InterfaceError", (Exception,), {})
+    PostgresError = type("PostgresError", (Exception,), {})
+    def __init__(self):
+        self.listeners = []
+        self.failures = 0
+    async def connect(self, dsn):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        self.listeners.append(FakeListener())
+        return self.listeners[-1]
+    async def create_pool(self, dsn, min_size, max_size):
+        return FakePool()
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        BroadcastBackend()
+def test_postgres_backend_reconnects_and_resubscribes(monkeypatch):
+    fake = FakeAsyncpg()
+    monkeypatch.setattr(pubsub, "asyncpg", fake)
+    monkeypatch.setattr(pubsub, "BROADCAST_RECONNECT_DELAY", 0)
+    delivered = []
+    async def deliver(board_id, frame):
+        delivered.append((board_id, frame))
+    async def scenario():
+        backend = PostgresBackend("postgresql://example")
+        await backend.start(deliver)
+        await backend.subscribe("1")
+        await backend.subscribe("2")
+        await backend.unsubscribe("2")
+        fake.failures = 2
+        fake.listeners[0].drop()
+        for _ in range(100):
+            if backend.reconnects:
+                break
+            await asyncio.sleep(0)
+        await backend.stop()
+        return backend
+    backend = asyncio.run(scenario())
+    assert backend.reconnects == 1
+    assert len(fake.listeners) == 2
+    assert list(fake.listeners[1].channels) == ["board_1"]
+    assert delivered == [("1", pubsub.resync_frame("1"))]
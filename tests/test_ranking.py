@@ -0,0 +1,67 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from conftest import database_path
+from ranking import initial_ranks, rank_between
+def test_rank_between_sorts_between_its_neighbours():
+    assert rank_between(None, None) == "V"
+    for before, after in (("V", None), (None, "V"), ("V", "W"), ("V", "V0V"), ("A", "B"), ("Az", "B"), ("0001", "0002")):
+        rank = rank_between(before, after)
+        assert (before is None or before < rank) and (after is None or rank < after), (before, after, rank)
+        assert not rank.endswith("0")
+def test_rank_between_survives_repeated_inserts_at_one_spot():
+    low, high = "A", "B"
+    for _ in range(200):
+        rank = rank_between(low, high)
+        assert low < rank < high
+        high = rank
+    low, high = "A", "B"
+    for _ in range(200):
+        rank = rank_between(low, high)
+        assert low < rank < high
+        low = rank
+def test_rank_between_rejects_unordered_neighbours():
+    with pytest.raises(ValueError):
+        rank_between("V", "V")
+    with pytest.raises(ValueError):
+        rank_between("W", "V")
+@pytest.mark.parametrize("count", [0, 1, 2, 61, 62, 1000])
+def test_initial_ranks_are_strictly_increasing_and_short(count):
+    ranks = initial_ranks(count)
+    assert len(ranks) == count
+    assert ranks == sorted(set(ranks))
+    assert all(rank and not rank.endswith("0") and len(rank) <= 2 for rank in ranks)
+def card_order(client, headers, list_id):
+    response = client.get(f"/lists/{list_id}/cards", headers=headers)
+    assert response.status_code == 200, response.text
+    return [(card["id"], card["position"]) for card in response.json()]
+def test_moving_between_equal_ranks_rebalances_the_list(client, headers, board_list):
+    ids = [
+        client.post(f"/lists/{board_list['id']}/cards", json={"title": f"Card {index}", "list_id": board_list["id"]}, headers=headers).json()["id"]
+        for index in range(4)
+    ]
+    with sqlite3.connect(database_path()) as connection:
+        connection.execute(f"UPDATE cards SET position = 'V' WHERE id IN ({', '.join('?' * 3)})", ids[:3])
+    response = client.post(f"/cards/{ids[3]}/move", json={"card_id": ids[3], "new_list_id": board_list["id"], "new_position": 1}, headers=headers)
+    assert response.status_code == 204, response.text
+    order = card_order(client, headers, board_list["id"])
+    assert [card_id for card_id, _ in order] == [ids[0], ids[3], ids[1], ids[2]]
+    positions = [position for _, position in order]
+    assert positions == sorted(set(positions))
+def test_concurrent_appends_can_still_be_reordered(client, headers, board_list):
+    def append(index):
+        return client.post(f"/lists/{board_list['id']}/cards", json={"title": f"Card {index}", "list_id": board_list["id"]}, headers=headers)
+    with ThreadPoolExecutor(4) as pool:
+        responses = list(pool.map(append, range(4)))
+    assert [response.status_code for response in responses] == [200] * 4
+    ids = [card_id for card_id, _ in card_order(client, headers, board_list["id"])]
+    response = client.post(f"/cards/{ids[3]}/move", json={"card_id": ids[3], "new_list_id": board_list["id"], "new_position": 2}, headers=headers)
+    assert response.status_code == 204, response.text
+    response = client.post(f"/boards/{board_list['board_id']}/batch", json={"operations": [
+        {"op": "move_card", "card_id": ids[0], "new_list_id": board_list["id"], "new_position": 3},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+    order = card_order(client, headers, board_list["id"])
+    assert [card_id for card_id, _ in order] == [ids[1], ids[3], ids[2], ids[0]]
+    positions = [position for _, position in order]
+    assert positions == sorted(set(positions))
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from starlette.websockets import WebSocketDisconnect
+from pubsub import InMemoryBackend
+from realtime import Connection, ConnectionManager, coalesce_key, collapse_events, revoke_frame
+def frame(message: dict) -> str:
+    return json.dumps(message)
+def queued(connection: Connection) -> list[dict]:
+    return [json.loads(data) for _, data in connection.pending]
+def fill(connection: Connection, messages: list[dict]):
+    for message in messages:
+        assert connection.enqueue(frame(message), coalesce_key(message))
+def test_coalesce_only_replaces_the_same_entity_update():
+    connection = Connection(None, "1", policy="coalesce", max_queue=3)
+    fill(connection, [
+        {"type": "card_updated", "card_id": 1, "version": 1},
+        {"type": "comment_created", "card_id": 1, "comment": {"id": 10}, "version": 2},
+        {"type": "card_updated", "card_id": 2, "version": 3},
+    ])
+    fill(connection, [{"type": "card_updated", "card_id": 1, "version": 4}])
+    assert [message["version"] for message in queued(connection)] == [2, 3, 4]
+def test_coalesce_falls_back_to_drop_oldest_for_non_superseding_events():
+    connection = Connection(None, "1", policy="coalesce", max_queue=3)
+    fill(connection, [
+        {"type": "card_updated", "card_id": 1, "version": 1},
+        {"type": "comment_created", "card_id": 7, "comment": {"id": 10}, "version": 2},
+        {"type": "label_added_to_card", "card_id": 7, "label": {"id": 3}, "version": 3},
+    ])
+    fill(connection, [{"type": "comment_created", "card_id": 7, "comment": {"id": 11}, "version": 4}])
+    assert [message["version"] for message in queued(connection)] == [2, 3, 4]
+    assert coalesce_key({"type": "card_created", "list_id": 1, "card": {"id": 5}}) is None
+def event_types(message) -> list[str]:
+    return [event["type"] for event in (message if isinstance(message, list) else [message])]
+def receive_until_closed(websocket, forbidden: tuple = ()) -> int:
+    try:
+        while True:
+            message = websocket.receive_json()
+            for event in message if isinstance(message, list) else [message]:
+                assert event["type"] not in forbidden, event
+    except WebSocketDisconnect as exc:
+        return exc.code
+def test_removed_member_socket_is_closed_before_later_events(client, register, headers, board, board_list):
+    member_id, member_headers = register()
+    response = client.post(f"/boards/{board['id']}/members", json={"user_id": member_id, "board_id": board["id"]}, headers=headers)
+    assert response.status_code == 204, response.text
+    token = member_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/ws/boards/{board['id']}?token={token}") as websocket:
+        assert "presence" in event_types(websocket.receive_json())
+        assert client.delete(f"/boards/{board['id']}/members/{member_id}", headers=headers).status_code == 204
+        response = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Secret", "list_id": board_list["id"]}, headers=headers)
+        assert response.status_code == 200, response.text
+        assert receive_until_closed(websocket, forbidden=("card_created",)) == 1008
+def test_deleting_a_board_closes_its_sockets(client, headers, board):
+    token = headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/ws/boards/{board['id']}?token={token}") as websocket:
+        assert "presence" in event_types(websocket.receive_json())
+        assert client.delete(f"/boards/{board['id']}", headers=headers).status_code == 204
+        assert receive_until_closed(websocket) == 1008
+def test_revoke_frame_closes_sockets_on_other_workers():
+    closed = []
+    class FakeWebSocket:
+        async def close(self, code, reason=None):
+            closed.append((code, reason))
+    async def scenario():
+        manager = ConnectionManager(InMemoryBackend())
+        for user_id in (1, 2):
+            websocket = FakeWebSocket()
+            manager.active_connections.setdefault("7", {})[websocket] = Connection(websocket, "7", user_id)
+        await manager.deliver("7", revoke_frame(2))
+        await asyncio.sleep(0)
+        return [connection.user_id for connection in manager.active_connections["7"].values()]
+    assert asyncio.run(scenario()) == [1]
+    assert closed == [(1008, "Access revoked")]
+def card_updated(card_id: int, version: int) -> dict:
+    return {"type": "card_updated", "card_id": card_id, "version": version}
+def test_collapse_orders_a_window_by_version():
+    collapsed = collapse_events([
+        {"type": "comment_created", "card_id": 1, "version": 7},
+        {"type": "presence", "user_id": 3, "status": "active"},
+        {"type": "card_created", "list_id": 1, "version": 6},
+    ])
+    assert [event["type"] for event in collapsed] == ["card_created", "presence", "comment_created"]
+def test_collapse_keeps_the_latest_update_of_an_entity_with_its_base_version():
+    collapsed = collapse_events([card_updated(1, 5), card_updated(2, 6), card_updated(1, 7), card_updated(1, 8)])
+    assert collapsed == [card_updated(2, 6), dict(card_updated(1, 8), base_version=4)]
+def test_collapse_applies_out_of_order_updates_in_version_order():
+    collapsed = collapse_events([card_updated(1, 7), card_updated(1, 6)])
+    assert collapsed == [dict(card_updated(1, 7), base_version=5)]
+def test_collapse_keeps_updates_separated_by_a_version_outside_the_window():
+    events = [card_updated(1, 5), card_updated(1, 7)]
+    assert collapse_events(events) == events
+def test_collapse_leaves_non_superseding_events_alone():
+    events = [
+        {"type": "comment_created", "card_id": 1, "comment": {"id": 1}, "version": 3},
+        {"type": "comment_created", "card_id": 1, "comment": {"id": 2}, "version": 4},
+        {"type": "card_moved", "card_id": 1, "list_id": 2, "position": "V", "version": 5},
+    ]
+    assert collapse_events(events) == events
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sqlite3
+import database
+from conftest import TEST_DIR, database_path
+from models import Base
+from permissions import ROLE_OWNER, get_board_role, permission_cache
+from snapshot import forget_board
+def lagging_replica() -> database.Replica:
+    replica = database.Replica(f"sqlite+aiosqlite:///{os.path.join(TEST_DIR, 'replica.db')}")
+    async def create_schema():
+        async with replica.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    asyncio.run(create_schema())
+    return replica
+def test_writes_route_later_reads_to_primary_on_any_worker(client, headers, board, monkeypatch):
+    client.cookies.clear()
+    chosen = []
+    monkeypatch.setattr(database.replicas, "choose", lambda: chosen.append(True))
+    assert client.get(f"/boards/{board['id']}/presence", headers=headers).status_code == 200
+    assert chosen == [True]
+    response = client.post(f"/boards/{board['id']}/lists", json={"name": "Later", "board_id": board["id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert database.READ_YOUR_WRITES_COOKIE in response.cookies
+    assert client.get(f"/boards/{board['id']}/presence", headers=headers).status_code == 200
+    assert chosen == [True]
+def test_board_roles_are_resolved_on_the_primary(client, board):
+    replica = lagging_replica()
+    forget_board(board["id"])
+    permission_cache.pop_where(lambda key: key[0] == board["id"])
+    async def resolve():
+        async with replica.sessionmaker() as session:
+            session.info["replica"] = True
+            role = await get_board_role(board["id"], board["owner_id"], session)
+        await replica.engine.dispose()
+        return role
+    assert asyncio.run(resolve()) == ROLE_OWNER
+    assert permission_cache.get((board["id"], board["owner_id"])) == ROLE_OWNER
+def test_sparse_board_from_a_lagging_replica_is_keyed_by_its_own_version(client, headers, board, monkeypatch):
+    client.cookies.clear()
+    assert client.get(f"/boards/{board['id']}", headers=headers).status_code == 200
+    replica = database.Replica(f"sqlite+aiosqlite:///{os.path.join(TEST_DIR, 'lagging.db')}")
+    with sqlite3.connect(database_path()) as primary, sqlite3.connect(os.path.join(TEST_DIR, "lagging.db")) as copy:
+        primary.backup(copy)
+    response = client.put(f"/boards/{board['id']}", json={"name": "new name"}, headers=headers)
+    assert response.status_code == 200, response.text
+    version = response.json()["version"]
+    client.cookies.clear()
+    monkeypatch.setattr(database.replicas, "choose", lambda: replica)
+    response = client.get(f"/boards/{board['id']}", params={"fields": "name,version"}, headers=headers)
+    assert response.status_code == 200, response.text
+    stale = response.json()
+    assert stale["name"] == "Board" and stale["version"] < version
+    assert response.headers["etag"].startswith(f'"board-{board["id"]}-v{stale["version"]}-')
+    monkeypatch.undo()
+    asyncio.run(replica.engine.dispose())
+    response = client.get(f"/boards/{board['id']}", params={"fields": "name,version"}, headers=headers)
+    assert response.json() == {"id": board["id"], "name": "new name", "version": version}
+    assert response.headers["etag"].startswith(f'"board-{board["id"]}-v{version}-')
@@ -0,0 +1,18 @@
+import json
+from responses import encode_json
+def test_encode_json_accepts_integer_keys():
+    assert json.loads(encode_json({"positions": {1: "V", 2: "i"}})) == {"positions": {"1": "V", "2": "i"}}
+def test_reorder_event_reaches_websocket_clients(client, headers, board, board_list):
+    other = client.post(f"/boards/{board['id']}/lists", json={"name": "Done", "board_id": board["id"]}, headers=headers).json()
+    token = headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/ws/boards/{board['id']}?token={token}") as websocket:
+        response = client.post("/lists/reorder", json=[{"id": other["id"], "position": 0}, {"id": board_list["id"], "position": 1}], headers=headers)
+        assert response.status_code == 204, response.text
+        for _ in range(10):
+            message = websocket.receive_json()
+            events = message if isinstance(message, list) else [message]
+            reordered = [event for event in events if event.get("type") == "lists_reordered"]
+            if reordered:
+                break
+        positions = reordered[0]["positions"]
+        assert sorted(positions, key=positions.get) == [str(other["id"]), str(board_list["id"])]
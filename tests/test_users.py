@@ -0,0 +1,25 @@
+def test_profile_update_invalidates_board_snapshots(client, register, headers, board, board_list):
+    member_id, member_headers = register()
+    client.post(f"/boards/{board['id']}/members", json={"user_id": member_id, "board_id": board["id"]}, headers=headers)
+    card = client.post(f"/lists/{board_list['id']}/cards", json={"title": "Card", "list_id": board_list["id"]}, headers=headers).json()
+    client.post(f"/cards/{card['id']}/comments", json={"content": "Hi", "card_id": card["id"]}, headers=member_headers)
+    response = client.get(f"/boards/{board['id']}", headers=headers)
+    etag = response.headers["etag"]
+    response = client.put("/users/me", json={"avatar": "https://example.com/a.png"}, headers=member_headers)
+    assert response.status_code == 200, response.text
+    response = client.get(f"/boards/{board['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    body = response.json()
+    assert [member["avatar"] for member in body["members"]] == ["https://example.com/a.png"]
+    assert body["lists"][0]["cards"][0]["comments"][0]["author"]["avatar"] == "https://example.com/a.png"
+    changes = client.get(f"/boards/{board['id']}/changes", params={"since": body["version"] - 1}, headers=headers).json()
+    assert {(change["entity"], change["op"]) for change in changes["changes"]} == {("member", "upsert"), ("comment", "upsert")}
+def test_account_deletion_invalidates_board_snapshots(client, register, headers, board):
+    member_id, member_headers = register()
+    client.post(f"/boards/{board['id']}/members", json={"user_id": member_id, "board_id": board["id"]}, headers=headers)
+    etag = client.get(f"/boards/{board['id']}", headers=headers).headers["etag"]
+    assert client.delete("/users/me", headers=member_headers).status_code == 204
+    response = client.get(f"/boards/{board['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["members"] == []
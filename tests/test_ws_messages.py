@@ -0,0 +1,56 @@
+import time
+import pytest
+from starlette.websockets import WebSocketDisconnect
+SENTINEL = {"type": "typing", "card_id": -1, "typing": False}
+def board_socket(client, headers, board):
+    token = headers["Authorization"].split()[1]
+    return client.websocket_connect(f"/ws/boards/{board['id']}?token={token}")
+def receive_until_sentinel(websocket) -> list[dict]:
+    received = []
+    while True:
+        message = websocket.receive_json()
+        for event in message if isinstance(message, list) else [message]:
+            if event.get("type") == "typing" and event.get("card_id") == -1:
+                return received
+            received.append(event)
+def test_oversized_frame_closes_with_1009(client, headers, board):
+    with board_socket(client, headers, board) as websocket:
+        websocket.send_text("x" * 5000)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                websocket.receive_json()
+    assert closed.value.code == 1009
+def test_invalid_messages_get_an_error_frame(client, headers, board):
+    with board_socket(client, headers, board) as websocket:
+        for message in ({"type": "bogus"}, {"type": "cursor", "x": 1, "y": 2, "html": "<b>"}, {"type": "presence", "status": "asleep"}):
+            websocket.send_json(message)
+        websocket.send_text("not json")
+        websocket.send_json(SENTINEL)
+        events = receive_until_sentinel(websocket)
+    assert [event for event in events if event["type"] == "error"] == [{"type": "error", "detail": "Invalid message"}] * 4
+    assert not [event for event in events if event["type"] in ("bogus", "cursor")]
+def test_token_bucket_drops_a_flood(client, headers, board):
+    import main
+    rate_limited = main.manager.rate_limited_messages
+    with board_socket(client, headers, board) as websocket:
+        for index in range(100):
+            websocket.send_json({"type": "typing", "card_id": index})
+        time.sleep(0.2)
+        websocket.send_json(SENTINEL)
+        events = receive_until_sentinel(websocket)
+    relayed = [event for event in events if event["type"] == "typing"]
+    assert 40 <= len(relayed) < 100
+    assert main.manager.rate_limited_messages - rate_limited == 100 - len(relayed)
+def test_cursor_and_drag_preview_are_throttled_to_the_latest_value(client, headers, board):
+    with board_socket(client, headers, board) as websocket:
+        for index in range(10):
+            websocket.send_json({"type": "cursor", "x": index, "y": 0})
+            websocket.send_json({"type": "drag_preview", "card_id": 1, "list_id": 1, "index": index})
+        time.sleep(0.2)
+        websocket.send_json(SENTINEL)
+        events = receive_until_sentinel(websocket)
+    cursors = [event for event in events if event["type"] == "cursor"]
+    previews = [event for event in events if event["type"] == "drag_preview"]
+    assert 1 <= len(cursors) < 10 and cursors[-1]["x"] == 9
+    assert 1 <= len(previews) < 10 and previews[-1]["index"] == 9
+    assert all("user_id" in event for event in cursors + previews)